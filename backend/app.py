@@ -5,14 +5,18 @@ Provides endpoints for quantum and classical VRP solving with comprehensive metr
 
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel, Field
 from typing import List, Dict, Any, Optional, Tuple
 import numpy as np
+import orjson
+import asyncio
 import time
 import traceback
 from contextlib import asynccontextmanager
 from distance.road_calc import create_osrm_calculator
+from routing.base_router import BaseRouter
 
 # Local imports
 from sample_data import (
@@ -85,6 +89,7 @@ async def lifespan(app: FastAPI):
     yield
     
     # Shutdown
+    await BaseRouter.close_shared_session()
     print("Shutting down VRP solver backend")
 
 # Create FastAPI app
@@ -130,6 +135,17 @@ def format_response(result: Dict[str, Any], success: bool = True) -> Dict[str, A
         "error": None if success else result.get("error", "Unknown error")
     }
 
+class NumpyJSONResponse(ORJSONResponse):
+    """orjson response that writes NumPy arrays straight from their buffers (no tolist())"""
+    
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=jsonable_encoder,
+                            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+def format_numpy_response(result: Dict[str, Any], success: bool = True) -> NumpyJSONResponse:
+    """format_response for payloads carrying NumPy arrays (e.g. distance matrices)"""
+    return NumpyJSONResponse(format_response(result, success))
+
 # API Endpoints
 
 @app.get("/")
@@ -186,10 +202,10 @@ async def get_test_cases_endpoint():
                 "depot_index": test_case.depot_index,
                 "qubits_needed": qubits_needed,
                 "quantum_feasible": is_quantum_feasible(test_case.num_locations),
-                "distance_matrix": test_case.distance_matrix.tolist()
+                "distance_matrix": test_case.distance_matrix
             }
         
-        return format_response({
+        return format_numpy_response({
             "test_cases": test_cases_info,
             "total_cases": len(test_cases_info),
             "quantum_feasible_cases": len([tc for tc in test_cases_info.values() if tc["quantum_feasible"]])
@@ -208,13 +224,13 @@ async def get_specific_test_case(case_name: str):
         test_case = app_state["test_cases"][case_name]
         qubits_needed = estimate_qubits_needed(test_case.num_locations, test_case.num_vehicles)
         
-        return format_response({
+        return format_numpy_response({
             "name": test_case.name,
             "locations": test_case.locations,
             "num_vehicles": test_case.num_vehicles,
             "num_locations": test_case.num_locations,
             "depot_index": test_case.depot_index,
-            "distance_matrix": test_case.distance_matrix.tolist(),
+            "distance_matrix": test_case.distance_matrix,
             "qubits_needed": qubits_needed,
             "quantum_feasible": is_quantum_feasible(test_case.num_locations)
         })
@@ -391,8 +407,9 @@ async def compare_all_algorithms(request: ComparisonRequest):
         if not quantum_feasible:
             print(f"Warning: Problem requires {qubits_needed} qubits, skipping quantum algorithms")
         
-        # Run comparison
-        result = compare_quantum_classical(
+        # Run comparison off the event loop; it blocks for the whole sweep
+        result = await asyncio.to_thread(
+            compare_quantum_classical,
             distance_matrix=distance_matrix,
             num_vehicles=request.problem.num_vehicles,
             quantum_optimizers=quantum_optimizers,
@@ -554,7 +571,7 @@ async def generate_random_problem(
         # Generate random test case
         test_case = create_random_test_case(num_locations, num_vehicles, seed)
         
-        return format_response({
+        return format_numpy_response({
             "problem": {
                 "locations": test_case.locations,
                 "num_vehicles": test_case.num_vehicles,
@@ -564,7 +581,7 @@ async def generate_random_problem(
                 "name": test_case.name,
                 "qubits_needed": qubits_needed,
                 "quantum_feasible": True,
-                "distance_matrix": test_case.distance_matrix.tolist()
+                "distance_matrix": test_case.distance_matrix
             }
         })
     
@@ -13,7 +13,8 @@ from .euclidean_calc import (
     EuclideanCalculator,
     haversine_distance,
     euclidean_distance_matrix,
-    simple_euclidean_2d
+    simple_euclidean_2d,
+    simple_euclidean_2d_numpy
 )
 from .road_calc import (
     RoadDistanceCalculator,
@@ -34,6 +35,7 @@ __all__ = [
     'haversine_distance',
     'euclidean_distance_matrix', 
     'simple_euclidean_2d',
+    'simple_euclidean_2d_numpy',
     
     # Road calculations
     'RoadDistanceCalculator',
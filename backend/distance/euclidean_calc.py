@@ -6,6 +6,9 @@ import math
 from typing import List, Tuple
 import numpy as np
 
+# Coordinates closer than this (in degrees) are treated as the same point
+COORD_EPSILON = 1e-9
+
 class EuclideanCalculator:
     """Calculator for straight-line distances between geographic coordinates"""
     
@@ -23,12 +26,12 @@ class EuclideanCalculator:
         Returns:
             Distance in kilometers
         """
-        if start == end:
-            return 0.0
-        
         lat1, lon1 = start
         lat2, lon2 = end
         
+        if abs(lat1 - lat2) < COORD_EPSILON and abs(lon1 - lon2) < COORD_EPSILON:
+            return 0.0
+        
         # Convert latitude and longitude from degrees to radians
         lat1_rad = math.radians(lat1)
         lat2_rad = math.radians(lat2)
@@ -66,19 +69,28 @@ class EuclideanCalculator:
         
         return matrix
     
-    def calculate_distance_matrix_numpy(self, locations: List[Tuple[float, float]]) -> np.ndarray:
+    def calculate_distance_matrix_numpy(self, locations: List[Tuple[float, float]],
+                                        dtype: np.dtype = np.float64) -> np.ndarray:
         """
         Vectorized distance matrix calculation using NumPy (faster for large datasets).
         
         Args:
             locations: List of (latitude, longitude) tuples
+            dtype: Floating point type used for the whole computation. np.float32
+                   keeps sub-meter precision for routing distances at half the memory.
             
         Returns:
             NumPy array representing distance matrix in kilometers
         """
-        locations_array = np.array(locations)
+        locations_array = np.asarray(locations, dtype=dtype)
         n = len(locations_array)
         
+        # Only compute Haversine between distinct points; duplicates are expanded at the end
+        unique_array, inverse = np.unique(locations_array, axis=0, return_inverse=True)
+        has_duplicates = len(unique_array) < n
+        if has_duplicates:
+            locations_array = unique_array
+        
         # Convert to radians
         coords_rad = np.radians(locations_array)
         
@@ -86,24 +98,28 @@ class EuclideanCalculator:
         lats = coords_rad[:, 0]
         lons = coords_rad[:, 1]
         
-        # Create meshgrids for vectorized calculation
-        lat1, lat2 = np.meshgrid(lats, lats, indexing='ij')
-        lon1, lon2 = np.meshgrid(lons, lons, indexing='ij')
+        # Haversine is symmetric, so only the strict upper triangle is computed
+        m = len(lats)
+        rows, cols = np.triu_indices(m, k=1)
         
         # Calculate differences
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
+        dlat = lats[cols] - lats[rows]
+        dlon = lons[cols] - lons[rows]
         
         # Haversine formula (vectorized)
         a = (np.sin(dlat / 2) ** 2 +
-             np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2)
+             np.cos(lats[rows]) * np.cos(lats[cols]) * np.sin(dlon / 2) ** 2)
         c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+        upper = self.earth_radius_km * c
         
-        # Distance matrix in kilometers
-        distance_matrix = self.earth_radius_km * c
+        # Diagonal stays zero from the allocation; mirror the upper triangle
+        distance_matrix = np.zeros((m, m), dtype=upper.dtype)
+        distance_matrix[rows, cols] = upper
+        distance_matrix[cols, rows] = upper
         
-        # Set diagonal to zero (distance from point to itself)
-        np.fill_diagonal(distance_matrix, 0.0)
+        if has_duplicates:
+            inverse = inverse.reshape(-1)
+            distance_matrix = distance_matrix[np.ix_(inverse, inverse)]
         
         return distance_matrix
     
@@ -160,4 +176,18 @@ def simple_euclidean_2d(x1: float, y1: float, x2: float, y2: float) -> float:
     Returns:
         Euclidean distance
     """
-    return math.sqrt((x2 - x1) ** 2 + (y2 - y1) ** 2)
\ No newline at end of file
+    return math.hypot(x2 - x1, y2 - y1)
+
+def simple_euclidean_2d_numpy(x1: np.ndarray, y1: np.ndarray,
+                              x2: np.ndarray, y2: np.ndarray) -> np.ndarray:
+    """
+    Vectorized 2D Euclidean distance for arrays of Cartesian coordinates.
+    
+    Args:
+        x1, y1: First point coordinate arrays
+        x2, y2: Second point coordinate arrays (broadcastable)
+        
+    Returns:
+        Array of Euclidean distances
+    """
+    return np.hypot(np.subtract(x2, x1), np.subtract(y2, y1))
\ No newline at end of file
@@ -5,12 +5,17 @@ Provides realistic vehicle routing distances and times.
 import asyncio
 from typing import List, Tuple, Optional, Dict, Any
 import logging
+import numpy as np
 from routing.osrm_client import OSRMClient
-from routing.routing_cache import get_cache_instance
+from routing.routing_cache import get_cache_instance, get_route_disk_cache
+from .euclidean_calc import EuclideanCalculator
 
 
 logger = logging.getLogger(__name__)
 
+# Shared calculator for the Euclidean fallback paths (stateless, safe to reuse)
+_FALLBACK_EUCLIDEAN = EuclideanCalculator()
+
 class RoadDistanceCalculator:
     """Road-based distance calculator using routing services"""
     
@@ -29,6 +34,7 @@ class RoadDistanceCalculator:
         self.profile = profile
         self.use_cache = use_cache
         self.router = None
+        self._router_open = False
         
         # Initialize cache if enabled
         if use_cache:
@@ -54,11 +60,17 @@ class RoadDistanceCalculator:
                 base_url=self.base_url,
                 profile=self.profile,
                 timeout=30,
-                max_retries=2
+                max_retries=2,
+                # Successful routes also persist across restarts when caching is on
+                disk_cache=get_route_disk_cache() if self.use_cache else None
             )
         else:
             raise ValueError(f"Service {self.service} not yet implemented")
         
+        # Keep one HTTP session open for the calculator's lifetime instead of per call
+        await self.router.__aenter__()
+        self._router_open = True
+        
         logger.info(f"Initialized {self.service} road distance calculator")
     
     async def calculate_distance(self, start: Tuple[float, float], 
@@ -95,21 +107,18 @@ class RoadDistanceCalculator:
             raise RuntimeError("Router not initialized. Call initialize() first.")
         
         try:
-            async with self.router:
-                result = await self.router.get_route(start, end)
+            result = await self.router.get_route(start, end)
 
-                if self.cache:
-                    self.cache.set_route(start, end, self.service, result, self.profile)
+            if self.cache:
+                self.cache.set_route(start, end, self.service, result, self.profile)
 
-                return {
-                    "distance": result.distance,
-                    "geometry": result.geometry
-                }
+            return {
+                "distance": result.distance,
+                "geometry": result.geometry
+            }
                 
         except Exception as e:
-            from .euclidean_calc import EuclideanCalculator
-            euclidean_calc = EuclideanCalculator()
-            euclidean_dist = euclidean_calc.calculate_distance(start, end)
+            euclidean_dist = _FALLBACK_EUCLIDEAN.calculate_distance(start, end)
             return {
                 "distance": euclidean_dist * 1.3,
                 "geometry": None  # no geometry in fallback
@@ -127,20 +136,19 @@ class RoadDistanceCalculator:
         if self.cache:
             cached_result = self.cache.get_matrix(locations, self.service, self.profile)
             if cached_result:
-                return cached_result.distances
+                return cached_result.distances.tolist()
         
         if not self.router:
             raise RuntimeError("Router not initialized. Call initialize() first.")
         
         try:
-            async with self.router:
-                result = await self.router.get_distance_matrix(locations)
-                
-                # Cache the result
-                if self.cache:
-                    self.cache.set_matrix(locations, self.service, result, self.profile)
-                
-                return result.distances
+            result = await self.router.get_distance_matrix(locations)
+            
+            # Cache the result
+            if self.cache:
+                self.cache.set_matrix(locations, self.service, result, self.profile)
+            
+            return result.distances.tolist()
                 
         except Exception as e:
             logger.error(f"Road distance matrix calculation failed: {str(e)}")
@@ -176,10 +184,9 @@ class RoadDistanceCalculator:
             return matrix
         except Exception as e:
             logger.error(f"Pairwise road distance calculation failed: {str(e)}")
-            from .euclidean_calc import EuclideanCalculator
-            euclidean_calc = EuclideanCalculator()
-            euclidean_matrix = euclidean_calc.calculate_distance_matrix(locations)
-            return [[dist * 1.3 for dist in row] for row in euclidean_matrix]
+            euclidean_matrix = _FALLBACK_EUCLIDEAN.calculate_distance_matrix_numpy(locations)
+            np.multiply(euclidean_matrix, 1.3, out=euclidean_matrix)
+            return euclidean_matrix.tolist()
 
     async def get_route_geometry(self, start: Tuple[float, float], 
                                end: Tuple[float, float]) -> Optional[List[List[float]]]:
@@ -188,9 +195,8 @@ class RoadDistanceCalculator:
             return None
         
         try:
-            async with self.router:
-                result = await self.router.get_route(start, end)
-                return result.geometry
+            result = await self.router.get_route(start, end)
+            return result.geometry
         except Exception as e:
             logger.error(f"Failed to get route geometry: {str(e)}")
             return None
@@ -228,6 +234,10 @@ class RoadDistanceCalculator:
     
     async def cleanup(self):
         """Cleanup resources"""
+        if self.router and self._router_open:
+            await self.router.__aexit__(None, None, None)
+            self._router_open = False
+        
         if self.router and hasattr(self.router, 'cleanup'):
             await self.router.cleanup()
         
@@ -6,8 +6,12 @@ Supports multiple optimization algorithms with adaptive selection.
 import numpy as np
 from typing import Dict, List, Tuple, Callable, Any, Optional
 from scipy.optimize import minimize, OptimizeResult
+import os
+import threading
 import time
+from collections import OrderedDict
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from qiskit_algorithms.optimizers import SPSA, COBYLA,ADAM
 
 
@@ -17,32 +21,113 @@ class QuantumOptimizer(ABC):
     def __init__(self, name: str, maxiter: int = 100):
         self.name = name
         self.maxiter = maxiter
-        self.history = []
         self.best_params = None
         self.best_value = float('inf')
         
+        # History is kept in preallocated arrays (allocated on first callback)
+        self._params_log: Optional[np.ndarray] = None
+        self._value_log: Optional[np.ndarray] = None
+        self._n_logged = 0
+        
     @abstractmethod
     def optimize(self, objective_function: Callable, initial_params: np.ndarray, 
                 bounds: List[Tuple[float, float]]) -> OptimizeResult:
         """Optimize the objective function"""
         pass
     
+    @property
+    def history(self) -> List[Dict[str, Any]]:
+        """Optimization history as a list of {'params', 'value', 'iteration'} dicts"""
+        return [
+            {'params': self._params_log[i].copy(), 'value': float(self._value_log[i]), 'iteration': i}
+            for i in range(self._n_logged)
+        ]
+    
+    @history.setter
+    def history(self, entries: List[Dict[str, Any]]):
+        self._params_log = None
+        self._value_log = None
+        self._n_logged = 0
+        for entry in entries:
+            self._log(entry['params'], entry['value'])
+    
+    @staticmethod
+    def _prepare_bounds(bounds: List[Tuple[float, float]]) -> Tuple[np.ndarray, np.ndarray]:
+        """Convert bounds once into contiguous lower/upper arrays for in-place np.clip"""
+        bounds_array = np.asarray(bounds, dtype=np.float64).reshape(-1, 2)
+        return np.ascontiguousarray(bounds_array[:, 0]), np.ascontiguousarray(bounds_array[:, 1])
+    
+    def history_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Logged parameters (iterations x n_params) and values as array views"""
+        if self._params_log is None:
+            return np.empty((0, 0)), np.empty(0)
+        return self._params_log[:self._n_logged], self._value_log[:self._n_logged]
+    
+    def _log(self, params: np.ndarray, value: float):
+        """Append one entry to the history arrays, growing them if needed"""
+        if self._params_log is None:
+            size = max(self.maxiter, 1)
+            self._params_log = np.empty((size, len(params)), dtype=np.float64)
+            self._value_log = np.empty(size, dtype=np.float64)
+        elif self._n_logged == len(self._value_log):
+            self._params_log = np.concatenate([self._params_log, np.empty_like(self._params_log)])
+            self._value_log = np.concatenate([self._value_log, np.empty_like(self._value_log)])
+        
+        self._params_log[self._n_logged] = params
+        self._value_log[self._n_logged] = value
+        self._n_logged += 1
+    
     def _callback(self, params: np.ndarray, value: float = None):
         """Callback function to track optimization progress"""
         if value is None:
             # If value not provided, we can't track it
             return
             
-        self.history.append({
-            'params': params.copy(),
-            'value': value,
-            'iteration': len(self.history)
-        })
+        self._log(params, value)
         
         if value < self.best_value:
             self.best_value = value
             self.best_params = params.copy()
 
+def _spsa_step(params: np.ndarray, delta: np.ndarray, ck: float, ak: float,
+               lb: np.ndarray, ub: np.ndarray, f_plus: float, f_minus: float) -> np.ndarray:
+    """Apply one SPSA update to params in place and clip to bounds"""
+    # delta is ±1, so dividing by it is the same as multiplying
+    params -= (ak * (f_plus - f_minus) / (2 * ck)) * delta
+    np.clip(params, lb, ub, out=params)
+    return params
+
+def _adam_step(params: np.ndarray, grad: np.ndarray, m: np.ndarray, v: np.ndarray,
+               b1t: float, b2t: float, lr: float, b1: float, b2: float, eps: float,
+               lb: np.ndarray, ub: np.ndarray,
+               buf: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Apply one ADAM update to params, m and v in place and clip to bounds
+    
+    b1t and b2t are beta1**t and beta2**t for the current step. buf is an
+    optional scratch array shaped like params, reused to avoid temporaries.
+    """
+    if buf is None:
+        buf = np.empty_like(params)
+    
+    # Biased first and second moment estimates
+    m *= b1
+    np.multiply(grad, 1 - b1, out=buf)
+    m += buf
+    v *= b2
+    np.square(grad, out=buf)
+    buf *= 1 - b2
+    v += buf
+    
+    # params -= lr * m_hat / (sqrt(v_hat) + eps), with bias corrections as scalars
+    np.sqrt(v, out=buf)
+    buf /= np.sqrt(1 - b2t)
+    buf += eps
+    np.divide(m, buf, out=buf)
+    buf *= lr / (1 - b1t)
+    params -= buf
+    np.clip(params, lb, ub, out=params)
+    return params, m, v
+
 class SPSAOptimizer(QuantumOptimizer):
     """
     Simultaneous Perturbation Stochastic Approximation (SPSA)
@@ -62,9 +147,17 @@ class SPSAOptimizer(QuantumOptimizer):
                 bounds: List[Tuple[float, float]]) -> OptimizeResult:
         """SPSA optimization implementation"""
         
-        params = initial_params.copy()
+        params = np.array(initial_params, dtype=np.float64)
         n_params = len(params)
         
+        lb, ub = self._prepare_bounds(bounds)
+        
+        # Pre-sample every Rademacher (±1) perturbation from one block of random bits,
+        # drawn from the global state so np.random.seed() makes runs reproducible
+        n_draws = self.maxiter * n_params
+        bits = np.unpackbits(np.frombuffer(np.random.bytes((n_draws + 7) // 8), dtype=np.uint8))
+        deltas = bits[:n_draws].reshape(self.maxiter, n_params).astype(np.int8) * 2 - 1
+        
         # SPSA parameters
         a = self.a
         c = self.c
@@ -81,38 +174,34 @@ class SPSAOptimizer(QuantumOptimizer):
             ck = c / (k + 1)**gamma
             
             # Random perturbation vector (Bernoulli ±1)
-            delta = 2 * np.random.randint(0, 2, n_params) - 1
+            delta = deltas[k]
             
             # Evaluate function at perturbed points
             params_plus = params + ck * delta
             params_minus = params - ck * delta
             
             # Apply bounds
-            params_plus = np.clip(params_plus, [b[0] for b in bounds], [b[1] for b in bounds])
-            params_minus = np.clip(params_minus, [b[0] for b in bounds], [b[1] for b in bounds])
+            np.clip(params_plus, lb, ub, out=params_plus)
+            np.clip(params_minus, lb, ub, out=params_minus)
             
             # Function evaluations
             f_plus = objective_function(params_plus)
             f_minus = objective_function(params_minus)
             
-            # SPSA gradient estimate
-            gradient = (f_plus - f_minus) / (2 * ck * delta)
+            # SPSA gradient estimate and bounded parameter update
+            _spsa_step(params, delta, ck, ak, lb, ub, f_plus, f_minus)
             
-            # Parameter update
-            params = params - ak * gradient
-            
-            # Apply bounds
-            params = np.clip(params, [b[0] for b in bounds], [b[1] for b in bounds])
-            
-            # Evaluate current point
-            current_value = objective_function(params)
+            # Track best solution from the two evaluated points (no extra center evaluation)
+            if f_plus <= f_minus:
+                current_value, current_params = f_plus, params_plus
+            else:
+                current_value, current_params = f_minus, params_minus
             
-            # Track best solution
             if current_value < best_value:
                 best_value = current_value
-                best_params = params.copy()
+                best_params = current_params.copy()
             
-            self._callback(params, current_value)
+            self._callback(current_params, current_value)
         
         return OptimizeResult(
             x=best_params,
@@ -129,66 +218,92 @@ class ADAMOptimizer(QuantumOptimizer):
     """
     
     def __init__(self, maxiter: int = 100, lr: float = 0.01, beta1: float = 0.9, 
-                 beta2: float = 0.999, epsilon: float = 1e-8):
+                 beta2: float = 0.999, epsilon: float = 1e-8, parallel: bool = False,
+                 max_grouped_evals: Optional[int] = None,
+                 batch_objective: Optional[Callable[[np.ndarray], np.ndarray]] = None):
+        """
+        Args:
+            parallel: Evaluate the finite-difference points in a thread pool
+            max_grouped_evals: Maximum concurrent evaluations (defaults to CPU count)
+            batch_objective: Optional objective taking a (k, n_params) array and
+                returning k values, used instead of per-point evaluation
+        """
         super().__init__("ADAM", maxiter)
         self.lr = lr
         self.beta1 = beta1
         self.beta2 = beta2
         self.epsilon = epsilon
+        self.parallel = parallel
+        self.max_grouped_evals = max_grouped_evals
+        self.batch_objective = batch_objective
+        
+        # Moment buffers and bias powers kept for warm restarts
+        self._m: Optional[np.ndarray] = None
+        self._v: Optional[np.ndarray] = None
+        self._b1t = 1.0
+        self._b2t = 1.0
     
     def _finite_difference_gradient(self, objective_function: Callable, 
-                                  params: np.ndarray, epsilon: float = 1e-6) -> np.ndarray:
-        """Compute gradient using finite differences"""
-        gradient = np.zeros_like(params)
-        
-        for i in range(len(params)):
-            params_plus = params.copy()
-            params_minus = params.copy()
-            
-            params_plus[i] += epsilon
-            params_minus[i] -= epsilon
-            
-            f_plus = objective_function(params_plus)
-            f_minus = objective_function(params_minus)
-            
-            gradient[i] = (f_plus - f_minus) / (2 * epsilon)
+                                  params: np.ndarray, epsilon: float = 1e-6,
+                                  batch_objective: Optional[Callable[[np.ndarray], np.ndarray]] = None) -> np.ndarray:
+        """Compute gradient using central finite differences over all 2N points at once"""
+        n = len(params)
+        idx = np.arange(n)
+        
+        # Rows 0..n-1 are the +epsilon points, rows n..2n-1 the -epsilon points
+        perturbed = np.tile(params, (2 * n, 1))
+        perturbed[idx, idx] += epsilon
+        perturbed[n + idx, idx] -= epsilon
+        
+        if batch_objective is not None:
+            values = np.asarray(batch_objective(perturbed), dtype=np.float64)
+        elif self.parallel:
+            max_workers = self.max_grouped_evals or os.cpu_count()
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                values = np.fromiter(executor.map(objective_function, perturbed),
+                                     dtype=np.float64, count=2 * n)
+        else:
+            values = np.fromiter(map(objective_function, perturbed),
+                                 dtype=np.float64, count=2 * n)
         
-        return gradient
+        return (values[:n] - values[n:]) / (2 * epsilon)
     
     def optimize(self, objective_function: Callable, initial_params: np.ndarray, 
-                bounds: List[Tuple[float, float]]) -> OptimizeResult:
-        """ADAM optimization implementation"""
+                bounds: List[Tuple[float, float]], warm_start: bool = False) -> OptimizeResult:
+        """ADAM optimization implementation
+        
+        With warm_start=True the moment estimates from the previous run are reused.
+        """
         
-        params = initial_params.copy()
+        params = np.array(initial_params, dtype=np.float64)
+        lb, ub = self._prepare_bounds(bounds)
         
         # ADAM state variables
-        m = np.zeros_like(params)  # First moment
-        v = np.zeros_like(params)  # Second moment
+        if warm_start and self._m is not None and self._m.shape == params.shape:
+            m, v = self._m, self._v
+            b1t, b2t = self._b1t, self._b2t
+        else:
+            m = np.zeros_like(params)  # First moment
+            v = np.zeros_like(params)  # Second moment
+            b1t = b2t = 1.0  # beta1**t, beta2**t
+        
+        # Scratch buffer for the fused in-place update
+        buf = np.empty_like(params)
         
         best_params = params.copy()
         best_value = objective_function(params)
         
         for t in range(1, self.maxiter + 1):
             # Compute gradient
-            gradient = self._finite_difference_gradient(objective_function, params)
-            
-            # Update biased first moment estimate
-            m = self.beta1 * m + (1 - self.beta1) * gradient
+            gradient = self._finite_difference_gradient(objective_function, params,
+                                                        batch_objective=self.batch_objective)
             
-            # Update biased second raw moment estimate
-            v = self.beta2 * v + (1 - self.beta2) * (gradient ** 2)
+            b1t *= self.beta1
+            b2t *= self.beta2
             
-            # Compute bias-corrected first moment estimate
-            m_hat = m / (1 - self.beta1 ** t)
-            
-            # Compute bias-corrected second raw moment estimate
-            v_hat = v / (1 - self.beta2 ** t)
-            
-            # Update parameters
-            params = params - self.lr * m_hat / (np.sqrt(v_hat) + self.epsilon)
-            
-            # Apply bounds
-            params = np.clip(params, [b[0] for b in bounds], [b[1] for b in bounds])
+            # Moment updates, bias correction and bounded parameter update
+            _adam_step(params, gradient, m, v, b1t, b2t, self.lr, self.beta1, self.beta2,
+                       self.epsilon, lb, ub, buf)
             
             # Evaluate current point
             current_value = objective_function(params)
@@ -200,6 +315,9 @@ class ADAMOptimizer(QuantumOptimizer):
             
             self._callback(params, current_value)
         
+        self._m, self._v = m, v
+        self._b1t, self._b2t = b1t, b2t
+        
         return OptimizeResult(
             x=best_params,
             fun=best_value,
@@ -208,83 +326,221 @@ class ADAMOptimizer(QuantumOptimizer):
             message="ADAM optimization completed"
         )
 
+class _Tracker:
+    """Objective wrapper that remembers evaluated values so callbacks need not re-evaluate"""
+    
+    def __init__(self, objective_function: Callable, maxsize: int = 256):
+        self.objective_function = objective_function
+        self.maxsize = maxsize
+        self.values = OrderedDict()
+    
+    def __call__(self, params: np.ndarray) -> float:
+        value = self.objective_function(params)
+        self.values[np.asarray(params, dtype=np.float64).tobytes()] = value
+        if len(self.values) > self.maxsize:
+            self.values.popitem(last=False)
+        return value
+    
+    def value_for(self, params: np.ndarray) -> Optional[float]:
+        """Recently evaluated value for exactly these params, or None if they were not seen"""
+        return self.values.get(np.asarray(params, dtype=np.float64).tobytes())
+
 class ScipyOptimizer(QuantumOptimizer):
     """Wrapper for SciPy optimizers"""
     
+    # Methods that accept an explicit gradient through minimize(jac=...)
+    JAC_METHODS = ('L-BFGS-B', 'SLSQP', 'TNC', 'BFGS')
+    
+    # Different methods have different parameter names for max iterations
+    ITER_PARAM_MAP = {
+        'COBYLA': 'maxiter',
+        'Powell': 'maxiter',
+        'L-BFGS-B': 'maxiter',
+        'SLSQP': 'maxiter',
+        'TNC': 'maxiter'
+    }
+    
     def __init__(self, method: str, maxiter: int = 100, **kwargs):
         super().__init__(method, maxiter)
         self.method = method
+        # Optional analytic / parameter-shift gradient, used instead of SciPy finite differences.
+        # A plain minimize() style jac= is accepted as the same thing and forwarded
+        # whatever the method, as it was before gradient_function existed
+        jac = kwargs.pop('jac', None)
+        self.gradient_function = kwargs.pop('gradient_function', None)
+        if self.gradient_function is None:
+            self.gradient_function = jac
+        self._pass_jac = self.gradient_function is not None and (
+            method in self.JAC_METHODS or jac is not None)
         self.kwargs = kwargs
+        
+        # Resolve minimize() options once; copied so the caller's dict is never mutated
+        self._options = dict(kwargs.get('options', {}))
+        if method in self.ITER_PARAM_MAP:
+            self._options[self.ITER_PARAM_MAP[method]] = maxiter
+        self._extra_kwargs = {k: v for k, v in kwargs.items() if k != 'options'}
     
     def optimize(self, objective_function: Callable, initial_params: np.ndarray, 
                 bounds: List[Tuple[float, float]]) -> OptimizeResult:
         """Use SciPy optimization methods"""
         
+        tracker = _Tracker(objective_function)
+        
         def callback_wrapper(params):
-            value = objective_function(params)
+            # Record the value SciPy already computed for this iterate; the last
+            # evaluation may have been a line-search trial point, so on a miss
+            # evaluate the iterate itself rather than pairing it with another value
+            value = tracker.value_for(params)
+            if value is None:
+                value = tracker(params)
             self._callback(params, value)
         
-        # Different methods have different parameter names for max iterations
-        iter_param_map = {
-            'COBYLA': 'maxiter',
-            'Powell': 'maxiter',
-            'L-BFGS-B': 'maxiter',
-            'SLSQP': 'maxiter',
-            'TNC': 'maxiter'
-        }
-        
-        options = self.kwargs.get('options', {})
-        if self.method in iter_param_map:
-            options[iter_param_map[self.method]] = self.maxiter
+        minimize_kwargs = dict(self._extra_kwargs)
+        if self._pass_jac:
+            minimize_kwargs['jac'] = self.gradient_function
         
         result = minimize(
-            objective_function,
+            tracker,
             initial_params,
             method=self.method,
             bounds=bounds,
-            options=options,
+            options=self._options,
             callback=callback_wrapper,
-            **{k: v for k, v in self.kwargs.items() if k != 'options'}
+            **minimize_kwargs
         )
         
         return result
 
+def _run_one(optimizer: QuantumOptimizer, objective_function: Callable,
+             initial_params: np.ndarray, bounds: List[Tuple[float, float]]):
+    """Run a single ensemble member and time it"""
+    start_time = time.time()
+    result = optimizer.optimize(objective_function, initial_params, bounds)
+    return optimizer.name, result, optimizer.history, time.time() - start_time
+
+class _CachedObjective:
+    """
+    Thread-safe LRU cache of objective values keyed by rounded parameter vectors
+    
+    One instance wraps the objective for a whole ensemble run. Members run
+    in the same process (sequentially or in threads), so they all share it.
+    """
+    
+    def __init__(self, objective_function: Callable, precision: int = 8, maxsize: int = 4096):
+        self.objective_function = objective_function
+        self.precision = precision
+        self.maxsize = maxsize
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+    
+    def __call__(self, params: np.ndarray) -> float:
+        key = np.round(np.asarray(params, dtype=np.float64), self.precision).tobytes()
+        
+        with self._lock:
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                self.hits += 1
+                return self.cache[key]
+        
+        value = self.objective_function(params)
+        
+        with self._lock:
+            self.misses += 1
+            self.cache[key] = value
+            if len(self.cache) > self.maxsize:
+                self.cache.popitem(last=False)
+        
+        return value
+    
 class EnsembleOptimizer(QuantumOptimizer):
     """
     Ensemble optimizer that runs multiple optimizers and selects the best result
     """
     
-    def __init__(self, optimizers: List[QuantumOptimizer], selection_strategy: str = "best_value"):
+    def __init__(self, optimizers: List[QuantumOptimizer], selection_strategy: str = "best_value",
+                 parallel: bool = True, cache_precision: int = 8):
         super().__init__("Ensemble", max([opt.maxiter for opt in optimizers]))
         self.optimizers = optimizers
         self.selection_strategy = selection_strategy
+        self.parallel = parallel
+        self.cache_precision = cache_precision
         self.results = {}
+        self.cache_stats = {}
     
-    def optimize(self, objective_function: Callable, initial_params: np.ndarray, 
-                bounds: List[Tuple[float, float]]) -> OptimizeResult:
-        """Run all optimizers and select the best result"""
-        
+    def _record(self, name: str, result: OptimizeResult, history: List[Dict],
+                execution_time: float) -> OptimizeResult:
+        """Store a member result in the ensemble bookkeeping"""
+        result.execution_time = execution_time
+        result.optimizer_name = name
+        self.results[name] = {
+            'result': result,
+            'history': history
+        }
+        return result
+    
+    def _run_sequential(self, objective_function: Callable, initial_params: np.ndarray,
+                        bounds: List[Tuple[float, float]]) -> List[OptimizeResult]:
+        """Run members one after another in this process"""
         results = []
         
         for optimizer in self.optimizers:
             print(f"Running {optimizer.name} optimizer...")
-            start_time = time.time()
             
             try:
-                result = optimizer.optimize(objective_function, initial_params, bounds)
-                result.execution_time = time.time() - start_time
-                result.optimizer_name = optimizer.name
-                results.append(result)
-                
-                self.results[optimizer.name] = {
-                    'result': result,
-                    'history': optimizer.history.copy()
-                }
-                
+                name, result, history, execution_time = _run_one(
+                    optimizer, objective_function, initial_params, bounds)
+                results.append(self._record(name, result, history, execution_time))
             except Exception as e:
                 print(f"Optimizer {optimizer.name} failed: {e}")
                 continue
         
+        return results
+    
+    def _run_parallel(self, objective_function: Callable, initial_params: np.ndarray,
+                      bounds: List[Tuple[float, float]]) -> List[OptimizeResult]:
+        """
+        Run members concurrently in a thread pool
+        
+        Threads keep every member's own state (best_params, optimizer moments,
+        history) on the objects the caller holds, and the heavy lifting in the
+        objective (NumPy / the simulator) releases the GIL.
+        """
+        completed = {}
+        
+        with ThreadPoolExecutor(max_workers=len(self.optimizers)) as executor:
+            futures = {}
+            for optimizer in self.optimizers:
+                print(f"Running {optimizer.name} optimizer...")
+                future = executor.submit(_run_one, optimizer, objective_function,
+                                         initial_params, bounds)
+                futures[future] = optimizer
+            
+            for future in as_completed(futures):
+                optimizer = futures[future]
+                try:
+                    name, result, history, execution_time = future.result()
+                    completed[name] = self._record(name, result, history, execution_time)
+                except Exception as e:
+                    print(f"Optimizer {optimizer.name} failed: {e}")
+        
+        # Keep member order stable regardless of completion order
+        return [completed[opt.name] for opt in self.optimizers if opt.name in completed]
+    
+    def optimize(self, objective_function: Callable, initial_params: np.ndarray, 
+                bounds: List[Tuple[float, float]]) -> OptimizeResult:
+        """Run all optimizers and select the best result"""
+        
+        # Members revisit overlapping parameter vectors, so share evaluated values
+        cached_objective = _CachedObjective(objective_function, precision=self.cache_precision)
+        objective_function = cached_objective
+        
+        if self.parallel and len(self.optimizers) > 1:
+            results = self._run_parallel(objective_function, initial_params, bounds)
+        else:
+            results = self._run_sequential(objective_function, initial_params, bounds)
+        
         if not results:
             raise RuntimeError("All optimizers failed")
         
@@ -299,6 +555,9 @@ class EnsembleOptimizer(QuantumOptimizer):
         self.history = self.results[best_optimizer_name]['history']
         
         best_result.ensemble_results = self.results
+        # Counts cover every member, since they all called the same cache
+        self.cache_stats = {'hits': cached_objective.hits, 'misses': cached_objective.misses}
+        best_result.cache_stats = self.cache_stats
         
         return best_result
 
@@ -310,13 +569,13 @@ class AdaptiveOptimizer(QuantumOptimizer):
     def __init__(self, maxiter: int = 100):
         super().__init__("Adaptive", maxiter)
         
-        # Initialize available optimizers
-        self.optimizers = {
-            'SPSA': SPSAOptimizer(maxiter=maxiter),
-            'ADAM': ADAMOptimizer(maxiter=maxiter),
-            'COBYLA': ScipyOptimizer('COBYLA', maxiter=maxiter),
-            'Powell': ScipyOptimizer('Powell', maxiter=maxiter),
-            'L-BFGS-B': ScipyOptimizer('L-BFGS-B', maxiter=maxiter)
+        # Factories for available optimizers; only the selected one is constructed
+        self._factories = {
+            'SPSA': lambda: SPSAOptimizer(maxiter=maxiter),
+            'ADAM': lambda: ADAMOptimizer(maxiter=maxiter),
+            'COBYLA': lambda: ScipyOptimizer('COBYLA', maxiter=maxiter),
+            'Powell': lambda: ScipyOptimizer('Powell', maxiter=maxiter),
+            'L-BFGS-B': lambda: ScipyOptimizer('L-BFGS-B', maxiter=maxiter)
         }
     
     def _analyze_landscape(self, objective_function: Callable, initial_params: np.ndarray, 
@@ -343,7 +602,7 @@ class AdaptiveOptimizer(QuantumOptimizer):
         """Select and run the most appropriate optimizer"""
         
         selected_optimizer_name = self._analyze_landscape(objective_function, initial_params, bounds)
-        selected_optimizer = self.optimizers[selected_optimizer_name]
+        selected_optimizer = self._factories[selected_optimizer_name]()
         
         print(f"Adaptive optimizer selected: {selected_optimizer_name}")
         
@@ -351,7 +610,7 @@ class AdaptiveOptimizer(QuantumOptimizer):
         result.selected_optimizer = selected_optimizer_name
         
         # Copy history from selected optimizer
-        self.history = selected_optimizer.history.copy()
+        self.history = selected_optimizer.history
         
         return result
 
@@ -421,7 +680,7 @@ def compare_optimizers(objective_function: Callable, initial_params: np.ndarray,
                 'best_params': result.x.tolist(),
                 'execution_time': execution_time,
                 'iterations': result.nit if hasattr(result, 'nit') else len(optimizer.history),
-                'history': optimizer.history.copy()
+                'history': optimizer.history
             }
             
             print(f"{name} completed: Best value = {result.fun:.6f}, Time = {execution_time:.2f}s")
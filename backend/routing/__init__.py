@@ -5,7 +5,7 @@ Provides interfaces for different routing services (OSRM, OpenRouteService, etc.
 from .base_router import BaseRouter, RouteResult, DistanceMatrix, RoutePoint, RouterError
 from .osrm_client import OSRMClient, create_osrm_client, test_osrm_connection
 from .openroute_client import OpenRouteClient, create_openroute_client
-from .routing_cache import RoutingCache, get_cache_instance
+from .routing_cache import RoutingCache, RouteDiskCache, get_cache_instance, get_route_disk_cache
 
 __all__ = [
     # Base classes
@@ -26,7 +26,9 @@ __all__ = [
     
     # Caching
     'RoutingCache',
-    'get_cache_instance'
+    'RouteDiskCache',
+    'get_cache_instance',
+    'get_route_disk_cache'
 ]
 
 # Version info
@@ -3,14 +3,85 @@ Abstract base class for routing services.
 Provides a common interface for different routing providers (OSRM, OpenRouteService, etc.)
 """
 from abc import ABC, abstractmethod
-from typing import List, Tuple, Dict, Any, Optional
+from typing import List, Tuple, Dict, Any, Optional, Iterable, Awaitable
 from dataclasses import dataclass
+from collections import OrderedDict
 import asyncio
+import random
+import threading
+import weakref
 import aiohttp
 import logging
+import numpy as np
+import orjson
 
 logger = logging.getLogger(__name__)
 
+# Above this many points the fallback Haversine matrix is computed in float32
+FLOAT32_MATRIX_THRESHOLD = 1000
+
+# Retry backoff: min(cap, base * 2**attempt) seconds with +/-50% jitter
+RETRY_BACKOFF_BASE = 0.25
+RETRY_BACKOFF_CAP = 10.0
+
+# Bodies larger than this (or of unknown length) are read in chunks
+STREAM_READ_THRESHOLD = 1 << 20
+STREAM_CHUNK_SIZE = 1 << 16
+
+# Connection pool sizing for the shared routing session
+SESSION_POOL_LIMIT = 32
+SESSION_POOL_LIMIT_PER_HOST = 16
+
+# Background event loop used by the synchronous router helpers
+_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_LOOP_LOCK = threading.Lock()
+
+def _get_background_loop() -> asyncio.AbstractEventLoop:
+    """Start (once) and return a daemon-thread event loop for sync callers"""
+    global _LOOP
+    with _LOOP_LOCK:
+        if _LOOP is None:
+            _LOOP = asyncio.new_event_loop()
+            threading.Thread(target=_LOOP.run_forever, name="router-loop", daemon=True).start()
+    return _LOOP
+
+async def gather_bounded(coros: Iterable[Awaitable], limit: int) -> List[Any]:
+    """
+    Await coroutines with at most `limit` in flight (sliding window)
+    
+    Coroutines are pulled from the iterable lazily, so a generator never
+    materializes more than `limit` frames. Results come back in input order;
+    the first exception cancels the remaining tasks and is re-raised.
+    """
+    coros = iter(coros)
+    results: Dict[int, Any] = {}
+    pending: Dict[asyncio.Future, int] = {}
+    next_index = 0
+    
+    def spawn() -> bool:
+        nonlocal next_index
+        coro = next(coros, None)
+        if coro is None:
+            return False
+        pending[asyncio.ensure_future(coro)] = next_index
+        next_index += 1
+        return True
+    
+    try:
+        while len(pending) < limit and spawn():
+            pass
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                results[pending.pop(task)] = task.result()
+                spawn()
+    except BaseException:
+        for task in pending:
+            task.cancel()
+        raise
+    
+    return [results[i] for i in range(next_index)]
+
 @dataclass
 class RoutePoint:
     """Represents a geographic point with latitude and longitude"""
@@ -33,35 +104,147 @@ class RouteResult:
     geometry: Optional[List[List[float]]] = None  # Route coordinates
     status: str = "success"
     error_message: Optional[str] = None
+    
+    @staticmethod
+    def pack_geometry(geometry: Optional[List[List[float]]]) -> Optional[bytes]:
+        """Quantize [[lng, lat], ...] to int32 micro-degrees (polyline6 precision, half of float64)"""
+        if geometry is None:
+            return None
+        return np.rint(np.asarray(geometry, dtype=np.float64) * 1e6).astype('<i4').tobytes()
+    
+    @staticmethod
+    def unpack_geometry(data: Optional[bytes]) -> Optional[List[List[float]]]:
+        """Inverse of pack_geometry"""
+        if data is None:
+            return None
+        # Dividing (rather than multiplying by 1e-6) gives the nearest float to each 6-decimal value
+        return (np.frombuffer(data, dtype='<i4').reshape(-1, 2) / 1e6).tolist()
+    
+    def to_cacheable(self) -> Dict[str, Any]:
+        """Plain dict for serialization (no dataclasses.asdict reflection or deep copy)"""
+        return {
+            'distance': self.distance,
+            'duration': self.duration,
+            'geometry': self.pack_geometry(self.geometry),
+            'status': self.status,
+            'error_message': self.error_message
+        }
+    
+    @classmethod
+    def from_cacheable(cls, data: Dict[str, Any]) -> "RouteResult":
+        return cls(
+            distance=data['distance'],
+            duration=data['duration'],
+            geometry=cls.unpack_geometry(data.get('geometry')),
+            status=data['status'],
+            error_message=data.get('error_message')
+        )
 
 @dataclass
 class DistanceMatrix:
     """Distance matrix result"""
-    distances: List[List[float]]  # Distance matrix in km
-    durations: List[List[float]]  # Duration matrix in seconds
+    distances: np.ndarray  # Distance matrix in km (float32)
+    durations: np.ndarray  # Duration matrix in seconds (float32)
     status: str = "success"
     error_message: Optional[str] = None
+    
+    def __post_init__(self):
+        # Store compactly as float32; sub-meter precision is not needed for road distances
+        self.distances = np.asarray(self.distances, dtype=np.float32)
+        self.durations = np.asarray(self.durations, dtype=np.float32)
+    
+    def to_cacheable(self) -> Dict[str, Any]:
+        """Plain dict for serialization; matrices are stored as raw float32 bytes plus shape"""
+        return {
+            'shape': list(self.distances.shape),
+            'distances': self.distances.tobytes(),
+            'durations': self.durations.tobytes(),
+            'status': self.status,
+            'error_message': self.error_message
+        }
+    
+    @classmethod
+    def from_cacheable(cls, data: Dict[str, Any]) -> "DistanceMatrix":
+        shape = tuple(data['shape'])
+        # Copy out of the (read-only) serialized buffer in one memcpy
+        return cls(
+            distances=np.frombuffer(data['distances'], dtype=np.float32).reshape(shape).copy(),
+            durations=np.frombuffer(data['durations'], dtype=np.float32).reshape(shape).copy(),
+            status=data['status'],
+            error_message=data.get('error_message')
+        )
 
 class BaseRouter(ABC):
     """Abstract base class for routing services"""
     
+    # Connection pool per event loop, shared by all routers running on it (the
+    # server loop and the background loop behind the *_sync helpers each get one)
+    _shared_sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = \
+        weakref.WeakKeyDictionary()
+    
     def __init__(self, base_url: str, api_key: Optional[str] = None, 
-                 timeout: int = 30, max_retries: int = 3):
+                 timeout: int = 30, max_retries: int = 3, max_concurrency: int = 5,
+                 symmetric: bool = True, route_cache_size: int = 1024,
+                 disk_cache: Optional[Any] = None):
         self.base_url = base_url.rstrip('/')
         self.api_key = api_key
         self.timeout = timeout
         self.max_retries = max_retries
-        self.session: Optional[aiohttp.ClientSession] = None
+        self.max_concurrency = max_concurrency
+        # Pairwise matrix fallbacks request only i < j and mirror the result
+        self.symmetric = symmetric
+        # In-process LRU of successful routes keyed on ~1 m rounded coordinates
+        self.route_cache_size = route_cache_size
+        self._route_cache: "OrderedDict[tuple, RouteResult]" = OrderedDict()
+        # Routes currently being fetched, so concurrent duplicates share one request;
+        # keyed by (loop, route key) since a future only works on the loop that made it
+        self._inflight: Dict[tuple, asyncio.Future] = {}
+        # Optional persistent layer (routing_cache.RouteDiskCache) behind the LRU
+        self.disk_cache = disk_cache
+        self.client_timeout = aiohttp.ClientTimeout(total=timeout)
     
     async def __aenter__(self):
-        """Async context manager entry"""
-        self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout))
+        """Async context manager entry (opens the running loop's shared pool)"""
+        await self._get_session()
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """Async context manager exit"""
-        if self.session:
-            await self.session.close()
+        """Async context manager exit (the shared pool stays open for other routers)"""
+        pass
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Return the running loop's shared keep-alive session, creating it if needed"""
+        loop = asyncio.get_running_loop()
+        session = BaseRouter._shared_sessions.get(loop)
+        
+        if session is None or session.closed:
+            # A few warm keep-alive sockets per host serve the whole pairwise fan-out
+            connector = aiohttp.TCPConnector(limit=SESSION_POOL_LIMIT,
+                                             limit_per_host=SESSION_POOL_LIMIT_PER_HOST,
+                                             keepalive_timeout=75, ttl_dns_cache=300,
+                                             enable_cleanup_closed=True)
+            session = aiohttp.ClientSession(connector=connector, timeout=self.client_timeout)
+            BaseRouter._shared_sessions[loop] = session
+        
+        return session
+    
+    @classmethod
+    async def close_shared_session(cls):
+        """Close every loop's shared connection pool (call on application shutdown)"""
+        current = asyncio.get_running_loop()
+        sessions = list(BaseRouter._shared_sessions.items())
+        BaseRouter._shared_sessions.clear()
+        
+        for loop, session in sessions:
+            if session.closed:
+                continue
+            if loop is current:
+                await session.close()
+            elif loop.is_running():
+                # A session must be closed on the loop that owns it
+                await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(session.close(), loop))
+            else:
+                logger.warning("Dropping routing session of a stopped event loop")
     
     def _prepare_coordinates(self, points: List[Tuple[float, float]]) -> List[RoutePoint]:
         """Convert coordinate tuples to RoutePoint objects"""
@@ -83,18 +266,159 @@ class BaseRouter(ABC):
         """Return the name of the routing service"""
         pass
     
+    def _run_sync(self, method, *args):
+        """Run a router coroutine on the background loop and wait for the result"""
+        # Requests resolve the session per call, so they use the background loop's own pool
+        future = asyncio.run_coroutine_threadsafe(method(*args), _get_background_loop())
+        return future.result()
+    
+    def get_route_sync(self, start: Tuple[float, float], end: Tuple[float, float]) -> RouteResult:
+        """Synchronous get_route for non-async callers (e.g. optimizer objectives)"""
+        return self._run_sync(self.get_route, start, end)
+    
+    def get_distance_matrix_sync(self, locations: List[Tuple[float, float]]) -> DistanceMatrix:
+        """Synchronous get_distance_matrix; the session stays alive on the background loop"""
+        return self._run_sync(self.get_distance_matrix, locations)
+    
+    def _route_key(self, start: Tuple[float, float], end: Tuple[float, float]) -> tuple:
+        """In-memory route cache key (5 decimals is roughly 1 m)"""
+        return (round(start[0], 5), round(start[1], 5), round(end[0], 5), round(end[1], 5),
+                getattr(self, 'profile', None))
+    
+    async def _get_route_cached(self, start: Tuple[float, float], end: Tuple[float, float],
+                                fetch) -> RouteResult:
+        """Serve a route from the LRU or an identical in-flight request, else fetch and cache it"""
+        key = self._route_key(start, end)
+        
+        cached = self._route_cache.get(key)
+        if cached is not None:
+            self._route_cache.move_to_end(key)
+            return cached
+        
+        loop = asyncio.get_running_loop()
+        inflight_key = (loop, key)
+        inflight = self._inflight.get(inflight_key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+        
+        future = loop.create_future()
+        self._inflight[inflight_key] = future
+        try:
+            result = self._disk_cache_get(start, end)
+            if result is None:
+                result = await fetch(start, end)
+                await self._disk_cache_set(start, end, result)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            del self._inflight[inflight_key]
+        
+        # Fallback and error results are not cached so they can be retried
+        if result.status == "success" and self.route_cache_size > 0:
+            self._route_cache[key] = result
+            if len(self._route_cache) > self.route_cache_size:
+                self._route_cache.popitem(last=False)
+        
+        return result
+    
+    def _disk_cache_get(self, start: Tuple[float, float], end: Tuple[float, float]) -> Optional[RouteResult]:
+        """Look a route up in the persistent cache, if one is configured"""
+        if self.disk_cache is None:
+            return None
+        try:
+            return self.disk_cache.get_route(start, end, self.get_service_name(),
+                                             getattr(self, 'profile', None))
+        except Exception as e:
+            logger.warning(f"Route disk cache read failed: {str(e)}")
+            return None
+    
+    async def _disk_cache_set(self, start: Tuple[float, float], end: Tuple[float, float],
+                              result: RouteResult):
+        """Persist a successful route, if a persistent cache is configured"""
+        if self.disk_cache is None or result.status != "success":
+            return
+        try:
+            # The insert + commit runs in a worker thread so it never stalls an event loop
+            await asyncio.to_thread(self.disk_cache.set_route, start, end, self.get_service_name(),
+                                    result, getattr(self, 'profile', None))
+        except Exception as e:
+            logger.warning(f"Route disk cache write failed: {str(e)}")
+    
+    @staticmethod
+    def _matrix_from_response(values: List[List[Optional[float]]], scale: float = 1.0) -> np.ndarray:
+        """Convert a JSON matrix to float32 in one pass; None (unroutable) becomes inf"""
+        matrix = np.asarray(values, dtype=np.float32)  # None -> NaN
+        if scale != 1.0:
+            matrix *= scale
+        matrix[np.isnan(matrix)] = np.inf
+        return matrix
+    
+    def _matrix_index_pairs(self, n: int) -> List[Tuple[int, int]]:
+        """Index pairs to request for an n x n pairwise matrix (upper triangle if symmetric)"""
+        if self.symmetric:
+            return [(i, j) for i in range(n) for j in range(i + 1, n)]
+        return [(i, j) for i in range(n) for j in range(n) if i != j]
+    
+    async def get_routes_batch(self, pairs: List[Tuple[Tuple[float, float], Tuple[float, float]]]) -> List[RouteResult]:
+        """Get routes for many (start, end) pairs concurrently, at most max_concurrency at a time"""
+        return await gather_bounded((self.get_route(start, end) for start, end in pairs),
+                                    self.max_concurrency)
+    
+    @staticmethod
+    async def _read_body(response: aiohttp.ClientResponse) -> bytes:
+        """Read the raw response body, streaming large or unsized payloads in chunks"""
+        length = response.content_length
+        if length is not None and length <= STREAM_READ_THRESHOLD:
+            return await response.read()
+        
+        buf = bytearray()
+        async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+            buf.extend(chunk)
+        return bytes(buf)
+    
+    @classmethod
+    async def _read_json(cls, response: aiohttp.ClientResponse) -> Dict[str, Any]:
+        """Decode a JSON response body with orjson straight from bytes (no str decode step)"""
+        return orjson.loads(await cls._read_body(response))
+    
+    @staticmethod
+    async def _retry_sleep(attempt: int, retry_after: Optional[str] = None):
+        """Sleep before a retry: honour a numeric Retry-After (capped), else jittered capped backoff"""
+        if retry_after is not None:
+            try:
+                # Never let the server park a request for longer than our own backoff cap
+                await asyncio.sleep(min(RETRY_BACKOFF_CAP, max(0.0, float(retry_after))))
+                return
+            except ValueError:
+                pass  # HTTP-date form; fall back to backoff
+        
+        delay = min(RETRY_BACKOFF_CAP, RETRY_BACKOFF_BASE * 2 ** attempt)
+        await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+    
     async def _make_request(self, url: str, params: Dict[str, Any] = None) -> Dict[str, Any]:
         """Make HTTP request with retries and error handling"""
-        if not self.session:
-            raise RuntimeError("Router not initialized. Use async context manager.")
+        session = await self._get_session()
         
         for attempt in range(self.max_retries):
+            retry_after = None
             try:
-                async with self.session.get(url, params=params) as response:
+                async with session.get(url, params=params, timeout=self.client_timeout) as response:
                     if response.status == 200:
-                        return await response.json()
+                        return await self._read_json(response)
                     else:
-                        logger.warning(f"HTTP {response.status} from {self.get_service_name()}: {await response.text()}")
+                        if response.status == 429:
+                            retry_after = response.headers.get("Retry-After")
+                        body = await self._read_body(response)
+                        logger.warning(f"HTTP {response.status} from {self.get_service_name()}: "
+                                       f"{body.decode('utf-8', errors='replace')}")
                         
             except asyncio.TimeoutError:
                 logger.warning(f"Timeout on attempt {attempt + 1} for {self.get_service_name()}")
@@ -102,20 +426,36 @@ class BaseRouter(ABC):
                 logger.error(f"Error on attempt {attempt + 1} for {self.get_service_name()}: {str(e)}")
             
             if attempt < self.max_retries - 1:
-                await asyncio.sleep(2 ** attempt)  # Exponential backoff
+                await self._retry_sleep(attempt, retry_after)
         
         raise Exception(f"Failed to get response from {self.get_service_name()} after {self.max_retries} attempts")
     
+    @staticmethod
+    def _valid_point(lat: float, lng: float) -> bool:
+        """Scalar bounds check for a single point (fast path for route requests)"""
+        if not (-90 <= lat <= 90):
+            logger.error(f"Invalid latitude: {lat}. Must be between -90 and 90.")
+            return False
+        if not (-180 <= lng <= 180):
+            logger.error(f"Invalid longitude: {lng}. Must be between -180 and 180.")
+            return False
+        return True
+    
     def validate_coordinates(self, coords: List[Tuple[float, float]]) -> bool:
         """Validate that coordinates are within valid ranges"""
-        for lat, lng in coords:
-            if not (-90 <= lat <= 90):
-                logger.error(f"Invalid latitude: {lat}. Must be between -90 and 90.")
-                return False
-            if not (-180 <= lng <= 180):
-                logger.error(f"Invalid longitude: {lng}. Must be between -180 and 180.")
-                return False
-        return True
+        if len(coords) == 0:
+            return True
+        arr = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+        lats, lngs = arr[:, 0], arr[:, 1]
+        
+        # One vectorized pass; NaN fails both comparisons and is rejected
+        lat_ok = (lats >= -90) & (lats <= 90)
+        lng_ok = (lngs >= -180) & (lngs <= 180)
+        if lat_ok.all() and lng_ok.all():
+            return True
+        
+        bad = int(np.argmin(lat_ok & lng_ok))
+        return self._valid_point(lats[bad], lngs[bad])  # logs the offending value
     
     def estimate_euclidean_distance(self, start: Tuple[float, float], 
                                   end: Tuple[float, float]) -> float:
@@ -138,6 +478,34 @@ class BaseRouter(ABC):
         c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
         
         return R * c
+    
+    @classmethod
+    def haversine_matrix(cls, coords: np.ndarray, dtype: Optional[np.dtype] = None) -> np.ndarray:
+        """
+        Vectorized Haversine distance matrix (in km)
+        
+        Args:
+            coords: (N, 2) array of (lat, lng) pairs
+            dtype: Output precision; defaults to float32 for large N, float64 otherwise
+        
+        Returns:
+            (N, N) distance matrix
+        """
+        if dtype is None:
+            dtype = np.float32 if len(coords) > FLOAT32_MATRIX_THRESHOLD else np.float64
+        coords = np.asarray(coords, dtype=dtype).reshape(-1, 2)
+        
+        lat = np.radians(coords[:, 0])[:, None]
+        lng = np.radians(coords[:, 1])[:, None]
+        dlat = lat - lat.T
+        dlng = lng - lng.T
+        
+        a = np.sin(dlat / 2) ** 2 + np.cos(lat) * np.cos(lat.T) * np.sin(dlng / 2) ** 2
+        return 2 * 6371 * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+    
+    def estimate_euclidean_matrix(self, locations: List[Tuple[float, float]]) -> np.ndarray:
+        """Calculate the Euclidean fallback distance matrix in one vectorized pass (in km)"""
+        return self.haversine_matrix(np.asarray(locations, dtype=np.float64))
 
 class RouterError(Exception):
     """Custom exception for routing errors"""
@@ -5,13 +5,19 @@ Requires API key for production usage.
 import asyncio
 from typing import List, Tuple, Dict, Any
 import logging
-from .base_router import BaseRouter, RouteResult, DistanceMatrix, RoutePoint, RouterError
+import numpy as np
+import orjson
+from .base_router import BaseRouter, RouteResult, DistanceMatrix, RoutePoint, RouterError, gather_bounded
+from .routing_cache import get_route_disk_cache
 
 logger = logging.getLogger(__name__)
 
 class OpenRouteClient(BaseRouter):
     """OpenRouteService routing client implementation"""
     
+    # Block size for tiled matrix requests; a tile never sends more than 2x this many locations
+    MATRIX_TILE_SIZE = 25
+    
     def __init__(self, api_key: str, base_url: str = "https://api.openrouteservice.org", 
                  profile: str = "driving-car", **kwargs):
         """
@@ -25,6 +31,8 @@ class OpenRouteClient(BaseRouter):
         if not api_key:
             raise ValueError("OpenRouteService requires an API key")
         
+        # ORS has strict rate limits, so keep pairwise fallbacks conservative
+        kwargs.setdefault('max_concurrency', 3)
         super().__init__(base_url, api_key, **kwargs)
         self.profile = profile
         
@@ -40,21 +48,33 @@ class OpenRouteClient(BaseRouter):
         
         # Use mapped profile
         self.ors_profile = self.profile_map.get(profile, profile)
+        
+        # Request headers never change, so build them once
+        self._headers = {
+            "Authorization": self.api_key,
+            "Content-Type": "application/json",
+            "Accept": "application/json"
+        }
     
     def get_service_name(self) -> str:
         return "OpenRouteService"
     
+    @staticmethod
+    def _locations_to_ors_coords(locations: List[Tuple[float, float]]) -> List[List[float]]:
+        """Swap (lat, lng) tuples to ORS [lng, lat] pairs in one NumPy column flip"""
+        return np.asarray(locations, dtype=np.float64)[:, ::-1].tolist()
+    
     def _get_headers(self) -> Dict[str, str]:
         """Get request headers with API key"""
-        return {
-            "Authorization": self.api_key,
-            "Content-Type": "application/json",
-            "Accept": "application/json"
-        }
+        return self._headers
     
     async def get_route(self, start: Tuple[float, float], end: Tuple[float, float]) -> RouteResult:
-        """Get route between two points using ORS directions API"""
-        if not self.validate_coordinates([start, end]):
+        """Get route between two points using ORS directions API (cached in memory)"""
+        return await self._get_route_cached(start, end, self._fetch_route)
+    
+    async def _fetch_route(self, start: Tuple[float, float], end: Tuple[float, float]) -> RouteResult:
+        """Request a route from the ORS directions API"""
+        if not (self._valid_point(*start) and self._valid_point(*end)):
             return RouteResult(
                 distance=0, duration=0, status="error",
                 error_message="Invalid coordinates"
@@ -127,14 +147,12 @@ class OpenRouteClient(BaseRouter):
             )
         
         if len(locations) > 50:  # ORS free tier limit
-            logger.warning("Too many locations for ORS free tier. Using pairwise calculation.")
-            return await self._calculate_matrix_pairwise(locations)
+            logger.warning("Too many locations for ORS free tier. Using tiled matrix requests.")
+            return await self._calculate_matrix_tiled(locations)
         
         try:
-            points = self._prepare_coordinates(locations)
-            
             # Build coordinates array for ORS
-            coordinates = [p.to_coords() for p in points]
+            coordinates = self._locations_to_ors_coords(locations)
             
             url = f"{self.base_url}/v2/matrix/{self.ors_profile}"
             
@@ -151,13 +169,9 @@ class OpenRouteClient(BaseRouter):
             distances_m = response.get("distances", [])
             durations_s = response.get("durations", [])
             
-            # Convert distances from meters to kilometers
-            distances_km = [[d/1000.0 if d is not None else float('inf') for d in row] 
-                           for row in distances_m]
-            
-            # Handle None values in durations
-            durations_clean = [[d if d is not None else float('inf') for d in row] 
-                              for row in durations_s]
+            # Convert distances from meters to kilometers; None values become inf
+            distances_km = self._matrix_from_response(distances_m, scale=0.001)
+            durations_clean = self._matrix_from_response(durations_s)
             
             return DistanceMatrix(
                 distances=distances_km,
@@ -169,31 +183,90 @@ class OpenRouteClient(BaseRouter):
             logger.error(f"ORS matrix request failed: {str(e)}")
             return await self._calculate_matrix_pairwise(locations)
     
+    async def _matrix_tile(self, coordinates: List[List[float]],
+                           src_idx: List[int], dst_idx: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """Request one sources x destinations block of the matrix (distances in km, durations in s)"""
+        # Only send the locations this tile needs; blocks are either identical or disjoint
+        if src_idx == dst_idx:
+            tile_idx = src_idx
+            sources = destinations = list(range(len(src_idx)))
+        else:
+            tile_idx = src_idx + dst_idx
+            sources = list(range(len(src_idx)))
+            destinations = list(range(len(src_idx), len(tile_idx)))
+        
+        url = f"{self.base_url}/v2/matrix/{self.ors_profile}"
+        payload = {
+            "locations": [coordinates[k] for k in tile_idx],
+            "sources": sources,
+            "destinations": destinations,
+            "metrics": ["distance", "duration"],
+            "resolve_locations": False
+        }
+        
+        response = await self._make_post_request(url, payload)
+        if "distances" not in response or "durations" not in response:
+            raise RouterError(f"Matrix tile failed: {response.get('error')}", self.get_service_name())
+        
+        distances = self._matrix_from_response(response["distances"], scale=0.001)
+        durations = self._matrix_from_response(response["durations"])
+        return distances, durations
+    
+    async def _calculate_matrix_tiled(self, locations: List[Tuple[float, float]]) -> DistanceMatrix:
+        """Assemble a large matrix from MATRIX_TILE_SIZE x MATRIX_TILE_SIZE block requests"""
+        n = len(locations)
+        blocks = [list(range(start, min(start + self.MATRIX_TILE_SIZE, n)))
+                  for start in range(0, n, self.MATRIX_TILE_SIZE)]
+        distances = np.empty((n, n), dtype=np.float32)
+        durations = np.empty((n, n), dtype=np.float32)
+        coordinates = self._locations_to_ors_coords(locations)
+        
+        async def fill_tile(src_idx: List[int], dst_idx: List[int]):
+            tile_distances, tile_durations = await self._matrix_tile(coordinates, src_idx, dst_idx)
+            rows = slice(src_idx[0], src_idx[-1] + 1)
+            cols = slice(dst_idx[0], dst_idx[-1] + 1)
+            distances[rows, cols] = tile_distances
+            durations[rows, cols] = tile_durations
+        
+        try:
+            await gather_bounded((fill_tile(src, dst) for src in blocks for dst in blocks),
+                                 self.max_concurrency)
+            return DistanceMatrix(
+                distances=distances,
+                durations=durations,
+                status="success"
+            )
+        except Exception as e:
+            logger.error(f"Tiled ORS matrix request failed: {str(e)}")
+            return await self._calculate_matrix_pairwise(locations)
+    
     async def _make_post_request(self, url: str, payload: Dict[str, Any]) -> Dict[str, Any]:
         """Make HTTP POST request with retries and error handling"""
-        if not self.session:
-            raise RuntimeError("Router not initialized. Use async context manager.")
+        session = await self._get_session()
         
-        headers = self._get_headers()
+        headers = self._headers
         
         for attempt in range(self.max_retries):
             try:
-                async with self.session.post(url, json=payload, headers=headers) as response:
+                async with session.post(url, data=orjson.dumps(payload), headers=headers,
+                                             timeout=self.client_timeout) as response:
                     if response.status == 200:
-                        return await response.json()
+                        return await self._read_json(response)
                     elif response.status == 401:
                         raise RouterError("Invalid API key", self.get_service_name(), 401)
                     elif response.status == 403:
                         raise RouterError("API quota exceeded", self.get_service_name(), 403)
                     elif response.status == 429:
                         logger.warning(f"Rate limit hit for {self.get_service_name()}")
-                        await asyncio.sleep(2 ** attempt)  # Exponential backoff
+                        if attempt < self.max_retries - 1:
+                            await self._retry_sleep(attempt, response.headers.get("Retry-After"))
                         continue
                     else:
-                        error_text = await response.text()
+                        body = await self._read_body(response)
+                        error_text = body.decode('utf-8', errors='replace')
                         logger.warning(f"HTTP {response.status} from {self.get_service_name()}: {error_text}")
                         try:
-                            return await response.json()
+                            return orjson.loads(body)
                         except Exception:
                             return {"error": error_text, "status_code": response.status}
                         
@@ -203,38 +276,30 @@ class OpenRouteClient(BaseRouter):
                 logger.error(f"Error on attempt {attempt + 1} for {self.get_service_name()}: {str(e)}")
             
             if attempt < self.max_retries - 1:
-                await asyncio.sleep(2 ** attempt)  # Exponential backoff
+                await self._retry_sleep(attempt)
         
         raise Exception(f"Failed to get response from {self.get_service_name()} after {self.max_retries} attempts")
     
     async def _calculate_matrix_pairwise(self, locations: List[Tuple[float, float]]) -> DistanceMatrix:
         """Calculate distance matrix by making pairwise route requests"""
         n = len(locations)
-        distances = [[0.0] * n for _ in range(n)]
-        durations = [[0.0] * n for _ in range(n)]
+        distances = np.zeros((n, n), dtype=np.float32)
+        durations = np.zeros((n, n), dtype=np.float32)
         
-        # Use semaphore to limit concurrent requests (ORS has rate limits)
-        semaphore = asyncio.Semaphore(3)  # Conservative limit
-        
-        async def get_pairwise_distance(i: int, j: int):
-            if i == j:
-                distances[i][j] = 0.0
-                durations[i][j] = 0.0
-                return
-            
-            async with semaphore:
-                route_result = await self.get_route(locations[i], locations[j])
-                distances[i][j] = route_result.distance
-                durations[i][j] = route_result.duration
-        
-        # Create tasks for all pairwise calculations
-        tasks = []
-        for i in range(n):
-            for j in range(n):
-                tasks.append(get_pairwise_distance(i, j))
+        # Off-diagonal pairs go through one concurrency-limited batch; the
+        # diagonal stays 0 and symmetric routers mirror (i, j) into (j, i)
+        index_pairs = self._matrix_index_pairs(n)
         
         try:
-            await asyncio.gather(*tasks)
+            route_results = await self.get_routes_batch(
+                [(locations[i], locations[j]) for i, j in index_pairs])
+            for (i, j), route_result in zip(index_pairs, route_results):
+                distances[i, j] = route_result.distance
+                durations[i, j] = route_result.duration
+                if self.symmetric:
+                    distances[j, i] = route_result.distance
+                    durations[j, i] = route_result.duration
+            
             return DistanceMatrix(
                 distances=distances,
                 durations=durations,
@@ -247,20 +312,12 @@ class OpenRouteClient(BaseRouter):
     
     def _euclidean_matrix_fallback(self, locations: List[Tuple[float, float]]) -> DistanceMatrix:
         """Create distance matrix using Euclidean distances as fallback"""
-        n = len(locations)
-        distances = [[0.0] * n for _ in range(n)]
-        durations = [[0.0] * n for _ in range(n)]
-        
-        for i in range(n):
-            for j in range(n):
-                if i != j:
-                    dist = self.estimate_euclidean_distance(locations[i], locations[j])
-                    distances[i][j] = dist
-                    durations[i][j] = dist * 60  # Rough estimate
+        # One vectorized Haversine pass; DistanceMatrix keeps the arrays as-is
+        matrix = self.estimate_euclidean_matrix(locations)
         
         return DistanceMatrix(
-            distances=distances,
-            durations=durations,
+            distances=matrix,
+            durations=matrix * 60,  # Rough estimate: 1km/min
             status="fallback",
             error_message="Using Euclidean distance fallback"
         )
@@ -275,7 +332,8 @@ def create_openroute_client(api_key: str, profile: str = "driving-car") -> OpenR
         api_key=api_key,
         profile=profile,
         timeout=30,
-        max_retries=3
+        max_retries=3,
+        disk_cache=get_route_disk_cache()
     )
 
 async def test_openroute_connection(client: OpenRouteClient) -> bool:
@@ -5,7 +5,9 @@ Supports both self-hosted OSRM instances and demo server.
 import asyncio
 from typing import List, Tuple, Dict, Any
 import logging
-from .base_router import BaseRouter, RouteResult, DistanceMatrix, RoutePoint, RouterError
+import numpy as np
+from .base_router import BaseRouter, RouteResult, DistanceMatrix, RouterError
+from .routing_cache import get_route_disk_cache
 import polyline
 
 logger = logging.getLogger(__name__)
@@ -32,25 +34,31 @@ class OSRMClient(BaseRouter):
     def get_service_name(self) -> str:
         return "OSRM"
     
+    @staticmethod
+    def _locations_to_osrm_coords(locations: List[Tuple[float, float]]) -> str:
+        """Format (lat, lng) tuples as OSRM's "lng,lat;lng,lat" path segment"""
+        return ";".join(f"{lng},{lat}" for lat, lng in locations)
+    
     async def get_route(self, start: Tuple[float, float], end: Tuple[float, float]) -> RouteResult:
-        """Get route between two points using OSRM route service"""
-        if not self.validate_coordinates([start, end]):
+        """Get route between two points using OSRM route service (cached in memory)"""
+        return await self._get_route_cached(start, end, self._fetch_route)
+    
+    async def _fetch_route(self, start: Tuple[float, float], end: Tuple[float, float]) -> RouteResult:
+        """Request a route from the OSRM route service"""
+        if not (self._valid_point(*start) and self._valid_point(*end)):
             return RouteResult(
                 distance=0, duration=0, status="error", 
                 error_message="Invalid coordinates"
             )
         
         try:
-            start_point = RoutePoint(start[0], start[1])
-            end_point = RoutePoint(end[0], end[1])
-            
             # OSRM expects coordinates as lng,lat
-            coords = f"{start_point.lng},{start_point.lat};{end_point.lng},{end_point.lat}"
+            coords = self._locations_to_osrm_coords((start, end))
             url = f"{self.base_url}/route/v1/{self.profile}/{coords}"
             
             params = {
                 "overview": "full",
-                "geometries": "geojson",
+                "geometries": "polyline6",  # ~5x smaller than GeoJSON coordinate arrays
                 "steps": "false"
             }
             
@@ -75,15 +83,10 @@ class OSRMClient(BaseRouter):
             distance_m = route.get("distance", 0)
             duration_s = route.get("duration", 0)
 
-            # --- FIXED GEOMETRY HANDLING ---
-            geometry = []
+            # Encoded polyline6 -> [[lng, lat], ...]
             geom = route.get("geometry")
-            if isinstance(geom, dict):        # GeoJSON LineString (default when geometries=geojson)
-                geometry = geom.get("coordinates", [])
-            elif isinstance(geom, str):       # Encoded polyline (if geometries=polyline)
-                decoded = polyline.decode(geom)  # [(lat, lon), ...]
-                geometry = [[lng, lat] for lat, lng in decoded]
-            # --- END FIX ---
+            decoded = polyline.decode(geom, precision=6) if geom else []  # [(lat, lng), ...]
+            geometry = [[lng, lat] for lat, lng in decoded]
             logger.info(f"OSRM geometry length: {len(geometry)} for route {start} -> {end}")
             return RouteResult(
                 distance=distance_m / 1000.0,  # Convert to km
@@ -117,10 +120,8 @@ class OSRMClient(BaseRouter):
             return await self._calculate_matrix_pairwise(locations)
         
         try:
-            points = self._prepare_coordinates(locations)
-            
             # Build coordinate string for OSRM
-            coords_str = ";".join([f"{p.lng},{p.lat}" for p in points])
+            coords_str = self._locations_to_osrm_coords(locations)
             url = f"{self.base_url}/table/v1/{self.profile}/{coords_str}"
             
             params = {
@@ -138,13 +139,9 @@ class OSRMClient(BaseRouter):
             distances_m = response.get("distances", [])
             durations_s = response.get("durations", [])
             
-            # Convert distances from meters to kilometers
-            distances_km = [[d/1000.0 if d is not None else float('inf') for d in row] 
-                           for row in distances_m]
-            
-            # Handle None values in durations
-            durations_clean = [[d if d is not None else float('inf') for d in row] 
-                              for row in durations_s]
+            # Convert distances from meters to kilometers; None values become inf
+            distances_km = self._matrix_from_response(distances_m, scale=0.001)
+            durations_clean = self._matrix_from_response(durations_s)
             
             return DistanceMatrix(
                 distances=distances_km,
@@ -159,31 +156,23 @@ class OSRMClient(BaseRouter):
     async def _calculate_matrix_pairwise(self, locations: List[Tuple[float, float]]) -> DistanceMatrix:
         """Calculate distance matrix by making pairwise route requests"""
         n = len(locations)
-        distances = [[0.0] * n for _ in range(n)]
-        durations = [[0.0] * n for _ in range(n)]
+        distances = np.zeros((n, n), dtype=np.float32)
+        durations = np.zeros((n, n), dtype=np.float32)
         
-        # Use semaphore to limit concurrent requests
-        semaphore = asyncio.Semaphore(5)  # Max 5 concurrent requests
-        
-        async def get_pairwise_distance(i: int, j: int):
-            if i == j:
-                distances[i][j] = 0.0
-                durations[i][j] = 0.0
-                return
-            
-            async with semaphore:
-                route_result = await self.get_route(locations[i], locations[j])
-                distances[i][j] = route_result.distance
-                durations[i][j] = route_result.duration
-        
-        # Create tasks for all pairwise calculations
-        tasks = []
-        for i in range(n):
-            for j in range(n):
-                tasks.append(get_pairwise_distance(i, j))
+        # Off-diagonal pairs go through one concurrency-limited batch; the
+        # diagonal stays 0 and symmetric routers mirror (i, j) into (j, i)
+        index_pairs = self._matrix_index_pairs(n)
         
         try:
-            await asyncio.gather(*tasks)
+            route_results = await self.get_routes_batch(
+                [(locations[i], locations[j]) for i, j in index_pairs])
+            for (i, j), route_result in zip(index_pairs, route_results):
+                distances[i, j] = route_result.distance
+                durations[i, j] = route_result.duration
+                if self.symmetric:
+                    distances[j, i] = route_result.distance
+                    durations[j, i] = route_result.duration
+            
             return DistanceMatrix(
                 distances=distances,
                 durations=durations,
@@ -196,20 +185,12 @@ class OSRMClient(BaseRouter):
     
     def _euclidean_matrix_fallback(self, locations: List[Tuple[float, float]]) -> DistanceMatrix:
         """Create distance matrix using Euclidean distances as fallback"""
-        n = len(locations)
-        distances = [[0.0] * n for _ in range(n)]
-        durations = [[0.0] * n for _ in range(n)]
-        
-        for i in range(n):
-            for j in range(n):
-                if i != j:
-                    dist = self.estimate_euclidean_distance(locations[i], locations[j])
-                    distances[i][j] = dist
-                    durations[i][j] = dist * 60  # Rough estimate: 1km/min
+        # One vectorized Haversine pass; DistanceMatrix keeps the arrays as-is
+        matrix = self.estimate_euclidean_matrix(locations)
         
         return DistanceMatrix(
-            distances=distances,
-            durations=durations,
+            distances=matrix,
+            durations=matrix * 60,  # Rough estimate: 1km/min
             status="fallback",
             error_message="Using Euclidean distance fallback"
         )
@@ -225,7 +206,8 @@ def create_osrm_client(base_url: str = None, profile: str = "driving") -> OSRMCl
         base_url=base_url,
         profile=profile,
         timeout=30,
-        max_retries=3
+        max_retries=3,
+        disk_cache=get_route_disk_cache()
     )
 
 async def test_osrm_connection(client: OSRMClient) -> bool:
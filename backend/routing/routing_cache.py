@@ -2,17 +2,155 @@
 Simple file-based caching system for routing API responses.
 Reduces API calls and improves performance for repeated route calculations.
 """
-import json
-import hashlib
+import atexit
+import mmap
 import os
+import sqlite3
+import struct
+import threading
 import time
-from typing import Dict, Any, Optional, List, Tuple
-from dataclasses import asdict
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, Any, Optional, List, Tuple, NamedTuple
 import logging
+import msgpack
+import numpy as np
+import xxhash
 from .base_router import RouteResult, DistanceMatrix
 
 logger = logging.getLogger(__name__)
 
+# Coordinates are keyed as int32 micro-degrees (6 decimals, ~11 cm)
+_POINT_STRUCT = struct.Struct("<ii")
+
+_ROUTE_STRUCT = struct.Struct("<iiii")
+
+def _pt_key(point: Tuple[float, float]) -> bytes:
+    """Pack a (lat, lng) pair as micro-degrees into a fixed 8-byte key"""
+    return _POINT_STRUCT.pack(round(point[0] * 1e6), round(point[1] * 1e6))
+
+@lru_cache(maxsize=64)
+def _key_prefix(service: str, profile: str) -> bytes:
+    """Encoded service/profile prefix, built once per combination"""
+    return f"{service}\0{profile}\0".encode()
+
+class CacheEntry(NamedTuple):
+    """Fixed-schema cache entry (packs as a two-element msgpack array)"""
+    timestamp: float
+    result: Dict[str, Any]
+
+# Compact a log once it holds this many times more entries than the live cache
+LOG_COMPACT_RATIO = 2
+LOG_COMPACT_MIN_ENTRIES = 64
+
+# Appended records are flushed to disk at most this often (seconds)
+CACHE_FLUSH_INTERVAL = 0.5
+
+class _LazyEntry:
+    """Location of a not-yet-decoded cache entry inside a memory-mapped log"""
+    __slots__ = ("offset", "length")
+    
+    def __init__(self, offset: int, length: int):
+        self.offset = offset
+        self.length = length
+
+class _AppendLog:
+    """Append-only msgpack log of {key: entry} records backing one cache dict"""
+    
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.entries = 0  # entries currently in the file, live or superseded
+        self._fh = None
+        # Guards this log and the cache dict it backs (re-entrant for nested helpers)
+        self.lock = threading.RLock()
+        self._mm: Optional[mmap.mmap] = None
+    
+    def load(self) -> Dict[int, Any]:
+        """
+        Index every record in the log (later records win) without decoding entries
+        
+        The file is memory-mapped and only keys are unpacked; values are
+        _LazyEntry offsets decoded on first access via read().
+        """
+        cache: Dict[int, Any] = {}
+        self.entries = 0
+        self.close()
+        if not os.path.exists(self.filename) or os.path.getsize(self.filename) == 0:
+            return cache
+        
+        with open(self.filename, 'r+b') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            unpacker = msgpack.Unpacker(mm, raw=False)
+            good_offset = 0
+            while True:
+                try:
+                    record = []
+                    for _ in range(unpacker.read_map_header()):
+                        key = unpacker.unpack()
+                        offset = unpacker.tell()
+                        unpacker.skip()
+                        record.append((key, _LazyEntry(offset, unpacker.tell() - offset)))
+                except msgpack.OutOfData:
+                    break
+                for key, ref in record:
+                    # Re-inserting keeps the dict in write (timestamp) order
+                    cache.pop(key, None)
+                    cache[key] = ref
+                self.entries += len(record)
+                good_offset = unpacker.tell()
+            
+            # Drop a record truncated by a crash mid-write so new appends stay parseable
+            if good_offset < len(mm):
+                mm.close()
+                f.truncate(good_offset)
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if good_offset else None
+        
+        # Appends land past the mapped length, so indexed offsets stay valid
+        self._mm = mm
+        return cache
+    
+    def read(self, ref: _LazyEntry) -> CacheEntry:
+        """Decode one entry straight from the mapped file"""
+        return CacheEntry(*msgpack.unpackb(self._mm[ref.offset:ref.offset + ref.length], raw=False))
+    
+    def append(self, key: int, entry: CacheEntry):
+        """Append a single-entry record (buffered until flush)"""
+        if self._fh is None:
+            self._fh = open(self.filename, 'ab')
+        self._fh.write(msgpack.packb({key: entry}, use_bin_type=True))
+        self.entries += 1
+    
+    def flush(self):
+        if self._fh is not None:
+            self._fh.flush()
+    
+    def needs_compaction(self, live_entries: int) -> bool:
+        return (self.entries > LOG_COMPACT_MIN_ENTRIES and
+                self.entries > LOG_COMPACT_RATIO * live_entries)
+    
+    def rewrite(self, cache: Dict[int, Any]):
+        """Replace the log with a single snapshot record of the live (fully decoded) cache"""
+        self.close()
+        tmp_filename = self.filename + ".tmp"
+        with open(tmp_filename, 'wb') as f:
+            msgpack.pack(cache, f, use_bin_type=True)
+        os.replace(tmp_filename, self.filename)
+        self.entries = len(cache)
+    
+    def close(self):
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+    
+    def remove(self):
+        self.close()
+        if os.path.exists(self.filename):
+            os.remove(self.filename)
+        self.entries = 0
+
 class RoutingCache:
     """File-based cache for routing results"""
     
@@ -30,84 +168,151 @@ class RoutingCache:
         # Create cache directory if it doesn't exist
         os.makedirs(cache_dir, exist_ok=True)
         
-        self.route_cache_file = os.path.join(cache_dir, "route_cache.json")
-        self.matrix_cache_file = os.path.join(cache_dir, "matrix_cache.json")
+        self.route_cache_file = os.path.join(cache_dir, "route_cache.log")
+        self.matrix_cache_file = os.path.join(cache_dir, "matrix_cache.log")
+        
+        # Inserts append one record instead of rewriting the whole file
+        self._route_log = _AppendLog(self.route_cache_file)
+        self._matrix_log = _AppendLog(self.matrix_cache_file)
+        self._batch_depth = 0
+        self._last_flush = time.monotonic()
+        
+        # Writes are coalesced, so persist whatever is still buffered on exit
+        atexit.register(self.flush)
         
         # Load existing cache
-        self.route_cache = self._load_cache(self.route_cache_file)
-        self.matrix_cache = self._load_cache(self.matrix_cache_file)
+        self.route_cache = self._load_cache(self._route_log)
+        self.matrix_cache = self._load_cache(self._matrix_log)
     
-    def _load_cache(self, filename: str) -> Dict[str, Any]:
-        """Load cache from JSON file"""
+    def _load_cache(self, log: _AppendLog) -> Dict[int, Any]:
+        """Load cache index from its msgpack log (entries are decoded on first access)"""
         try:
-            if os.path.exists(filename):
-                with open(filename, 'r') as f:
-                    cache = json.load(f)
-                    # Clean expired entries
-                    return self._clean_expired_entries(cache)
-            return {}
+            # Expired entries are skipped on read and dropped by cleanup_expired
+            return log.load()
         except Exception as e:
-            logger.warning(f"Failed to load cache from {filename}: {str(e)}")
+            logger.warning(f"Failed to load cache from {log.filename}: {str(e)}")
             return {}
     
-    def _save_cache(self, cache: Dict[str, Any], filename: str):
-        """Save cache to JSON file"""
+    def _resolve(self, cache: Dict[int, Any], log: _AppendLog, key: int) -> Optional[CacheEntry]:
+        """Return a cache entry, decoding it from the mapped log on first access"""
+        entry = cache.get(key)
+        if isinstance(entry, _LazyEntry):
+            entry = cache[key] = log.read(entry)
+        return entry
+    
+    def _lookup(self, cache: Dict[int, Any], log: _AppendLog, key: int) -> Optional[CacheEntry]:
+        """Return a live cache entry, lazily dropping it (and every older entry) if expired"""
+        with log.lock:
+            entry = self._resolve(cache, log, key)
+            if entry is not None and time.time() - entry.timestamp >= self.cache_ttl:
+                self._clean_expired_entries(cache, log)
+                return None
+            return entry
+    
+    def _resolve_all(self, cache: Dict[int, Any], log: _AppendLog):
+        """Decode every entry still pending in the mapped log"""
+        for key, entry in cache.items():
+            if isinstance(entry, _LazyEntry):
+                cache[key] = log.read(entry)
+    
+    def _save_cache(self, cache: Dict[int, Any], log: _AppendLog):
+        """Compact the log down to a snapshot of the live cache"""
         try:
-            with open(filename, 'w') as f:
-                json.dump(cache, f, indent=2)
+            self._resolve_all(cache, log)
+            log.rewrite(cache)
         except Exception as e:
-            logger.error(f"Failed to save cache to {filename}: {str(e)}")
+            logger.error(f"Failed to save cache to {log.filename}: {str(e)}")
     
-    def _clean_expired_entries(self, cache: Dict[str, Any]) -> Dict[str, Any]:
-        """Remove expired cache entries"""
-        current_time = time.time()
-        cleaned_cache = {}
+    def _store(self, cache: Dict[int, Any], log: _AppendLog, key: int, entry: CacheEntry):
+        """Insert an entry and append it to the log; bursts are coalesced into one flush per interval"""
+        with log.lock:
+            cache.pop(key, None)  # move to the newest end
+            cache[key] = entry
+            self._clean_expired_entries(cache, log)
+            try:
+                log.append(key, entry)
+            except Exception as e:
+                logger.error(f"Failed to append cache entry to {log.filename}: {str(e)}")
+                return
         
-        for key, value in cache.items():
-            if isinstance(value, dict) and 'timestamp' in value:
-                if current_time - value['timestamp'] < self.cache_ttl:
-                    cleaned_cache[key] = value
-                    
-        return cleaned_cache
+        # Flushed outside the lock: flush() takes each log's lock in turn
+        if self._batch_depth == 0 and time.monotonic() - self._last_flush >= CACHE_FLUSH_INTERVAL:
+            self.flush()
     
-    def _generate_route_key(self, start: Tuple[float, float], end: Tuple[float, float], 
-                           service: str, profile: str = "driving") -> str:
-        """Generate unique cache key for route request"""
-        # Round coordinates to reduce cache misses due to tiny differences
-        start_rounded = (round(start[0], 6), round(start[1], 6))
-        end_rounded = (round(end[0], 6), round(end[1], 6))
+    @contextmanager
+    def batch(self):
+        """Defer log flushes (and compaction) until a burst of inserts is done"""
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self.flush()
+    
+    def flush(self):
+        """Flush pending log writes, compacting logs that have grown too large"""
+        self._last_flush = time.monotonic()
+        for cache, log in ((self.route_cache, self._route_log), (self.matrix_cache, self._matrix_log)):
+            with log.lock:
+                try:
+                    log.flush()
+                except Exception as e:
+                    logger.error(f"Failed to flush {log.filename}: {str(e)}")
+                if log.needs_compaction(len(cache)):
+                    self._save_cache(cache, log)
+    
+    def _expired_keys(self, cache: Dict[int, Any], log: _AppendLog) -> List[int]:
+        """
+        Keys of expired entries
         
-        key_data = f"{service}_{profile}_{start_rounded}_{end_rounded}"
-        return hashlib.md5(key_data.encode()).hexdigest()
+        Caches are kept in write order, so timestamps are non-decreasing and the
+        expired entries are exactly a prefix; the scan stops at the first live one.
+        """
+        cutoff = time.time() - self.cache_ttl
+        expired = []
+        for key in cache:
+            if self._resolve(cache, log, key).timestamp > cutoff:
+                break
+            expired.append(key)
+        return expired
+    
+    def _clean_expired_entries(self, cache: Dict[int, Any], log: _AppendLog) -> int:
+        """Remove expired cache entries in place (cost proportional to the number removed)"""
+        expired = self._expired_keys(cache, log)
+        for key in expired:
+            del cache[key]
+        return len(expired)
+    
+    def _generate_route_key(self, start: Tuple[float, float], end: Tuple[float, float], 
+                           service: str, profile: str = "driving") -> int:
+        """Generate unique cache key for route request (64-bit int, cheap to hash and compare)"""
+        # Coordinates are packed as int32 micro-degrees instead of formatted tuples
+        h = xxhash.xxh3_64(_key_prefix(service, profile))
+        h.update(_ROUTE_STRUCT.pack(round(start[0] * 1e6), round(start[1] * 1e6),
+                                    round(end[0] * 1e6), round(end[1] * 1e6)))
+        return h.intdigest()
     
     def _generate_matrix_key(self, locations: List[Tuple[float, float]], 
-                           service: str, profile: str = "driving") -> str:
+                           service: str, profile: str = "driving") -> int:
         """Generate unique cache key for distance matrix request"""
-        locations_rounded = tuple((round(lat, 6), round(lng, 6)) for lat, lng in locations)
-        key_data = f"{service}_{profile}_{locations_rounded}"
-        return hashlib.md5(key_data.encode()).hexdigest()
+        # Hash the micro-degree coordinate buffer in one C-level pass instead of per-point reprs
+        h = xxhash.xxh3_64(_key_prefix(service, profile))
+        micro = np.rint(np.asarray(locations, dtype=np.float64) * 1e6).astype('<i4')
+        h.update(micro.tobytes())
+        return h.intdigest()
     
     def get_route(self, start: Tuple[float, float], end: Tuple[float, float],
                   service: str, profile: str = "driving") -> Optional[RouteResult]:
         """Get cached route result"""
         key = self._generate_route_key(start, end, service, profile)
         
-        if key in self.route_cache:
-            cached_data = self.route_cache[key]
+        cached_data = self._lookup(self.route_cache, self._route_log, key)
+        if cached_data is not None:
+            logger.debug(f"Cache hit for route {service}: {start} -> {end}")
             
-            # Check if cache entry is still valid
-            if time.time() - cached_data['timestamp'] < self.cache_ttl:
-                logger.debug(f"Cache hit for route {service}: {start} -> {end}")
-                
-                # Convert cached data back to RouteResult
-                result_data = cached_data['result']
-                return RouteResult(
-                    distance=result_data['distance'],
-                    duration=result_data['duration'],
-                    geometry=result_data.get('geometry'),
-                    status=result_data['status'],
-                    error_message=result_data.get('error_message')
-                )
+            # Convert cached data back to RouteResult
+            return RouteResult.from_cacheable(cached_data.result)
         
         return None
     
@@ -116,19 +321,9 @@ class RoutingCache:
         """Cache route result"""
         key = self._generate_route_key(start, end, service, profile)
         
-        cache_entry = {
-            'timestamp': time.time(),
-            'result': asdict(result),
-            'request': {
-                'start': start,
-                'end': end,
-                'service': service,
-                'profile': profile
-            }
-        }
+        cache_entry = CacheEntry(time.time(), result.to_cacheable())
         
-        self.route_cache[key] = cache_entry
-        self._save_cache(self.route_cache, self.route_cache_file)
+        self._store(self.route_cache, self._route_log, key, cache_entry)
         
         logger.debug(f"Cached route for {service}: {start} -> {end}")
     
@@ -137,21 +332,12 @@ class RoutingCache:
         """Get cached distance matrix result"""
         key = self._generate_matrix_key(locations, service, profile)
         
-        if key in self.matrix_cache:
-            cached_data = self.matrix_cache[key]
+        cached_data = self._lookup(self.matrix_cache, self._matrix_log, key)
+        if cached_data is not None:
+            logger.debug(f"Cache hit for matrix {service}: {len(locations)} locations")
             
-            # Check if cache entry is still valid
-            if time.time() - cached_data['timestamp'] < self.cache_ttl:
-                logger.debug(f"Cache hit for matrix {service}: {len(locations)} locations")
-                
-                # Convert cached data back to DistanceMatrix
-                result_data = cached_data['result']
-                return DistanceMatrix(
-                    distances=result_data['distances'],
-                    durations=result_data['durations'],
-                    status=result_data['status'],
-                    error_message=result_data.get('error_message')
-                )
+            # Convert cached data back to DistanceMatrix
+            return DistanceMatrix.from_cacheable(cached_data.result)
         
         return None
     
@@ -160,45 +346,31 @@ class RoutingCache:
         """Cache distance matrix result"""
         key = self._generate_matrix_key(locations, service, profile)
         
-        cache_entry = {
-            'timestamp': time.time(),
-            'result': asdict(result),
-            'request': {
-                'locations': locations,
-                'service': service,
-                'profile': profile
-            }
-        }
+        cache_entry = CacheEntry(time.time(), result.to_cacheable())
         
-        self.matrix_cache[key] = cache_entry
-        self._save_cache(self.matrix_cache, self.matrix_cache_file)
+        self._store(self.matrix_cache, self._matrix_log, key, cache_entry)
         
         logger.debug(f"Cached matrix for {service}: {len(locations)} locations")
     
     def clear_cache(self):
         """Clear all cached data"""
-        self.route_cache.clear()
-        self.matrix_cache.clear()
-        
-        # Remove cache files
-        for filename in [self.route_cache_file, self.matrix_cache_file]:
-            if os.path.exists(filename):
-                os.remove(filename)
+        # Clear entries and remove cache files
+        for cache, log in ((self.route_cache, self._route_log), (self.matrix_cache, self._matrix_log)):
+            with log.lock:
+                cache.clear()
+                log.remove()
         
         logger.info("Routing cache cleared")
     
     def get_cache_stats(self) -> Dict[str, Any]:
         """Get cache statistics"""
-        current_time = time.time()
-        
-        route_entries = len(self.route_cache)
-        matrix_entries = len(self.matrix_cache)
-        
         # Count expired entries
-        route_expired = sum(1 for entry in self.route_cache.values() 
-                           if current_time - entry['timestamp'] >= self.cache_ttl)
-        matrix_expired = sum(1 for entry in self.matrix_cache.values() 
-                            if current_time - entry['timestamp'] >= self.cache_ttl)
+        with self._route_log.lock:
+            route_entries = len(self.route_cache)
+            route_expired = len(self._expired_keys(self.route_cache, self._route_log))
+        with self._matrix_log.lock:
+            matrix_entries = len(self.matrix_cache)
+            matrix_expired = len(self._expired_keys(self.matrix_cache, self._matrix_log))
         
         return {
             'route_cache': {
@@ -217,20 +389,124 @@ class RoutingCache:
     
     def cleanup_expired(self):
         """Remove expired cache entries and save"""
-        self.route_cache = self._clean_expired_entries(self.route_cache)
-        self.matrix_cache = self._clean_expired_entries(self.matrix_cache)
+        for cache, log in ((self.route_cache, self._route_log), (self.matrix_cache, self._matrix_log)):
+            with log.lock:
+                self._clean_expired_entries(cache, log)
         
-        self._save_cache(self.route_cache, self.route_cache_file)
-        self._save_cache(self.matrix_cache, self.matrix_cache_file)
+        # Logs are only rewritten once enough of their entries are dead
+        self.flush()
         
         logger.info("Cleaned up expired cache entries")
 
+class RouteDiskCache:
+    """SQLite-backed route cache that survives process restarts (WAL mode, one connection)"""
+    
+    def __init__(self, db_path: str = os.path.join("cache", "routes.db"), cache_ttl: Optional[int] = None):
+        """
+        Initialize route disk cache
+        
+        Args:
+            db_path: SQLite database file
+            cache_ttl: Entry time-to-live in seconds (None keeps entries forever)
+        """
+        self.db_path = db_path
+        self.cache_ttl = cache_ttl
+        
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        
+        # Point lookups on a warm local connection take microseconds, so they run inline
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS routes ("
+            "key BLOB PRIMARY KEY, distance REAL, duration REAL, geometry BLOB, timestamp REAL)"
+        )
+        self._conn.commit()
+        self.purge_expired()
+    
+    @staticmethod
+    def _key(start: Tuple[float, float], end: Tuple[float, float], service: str, profile: str) -> bytes:
+        """Service/profile prefix followed by the packed, rounded coordinates"""
+        return f"{service}_{profile}_".encode() + _pt_key(start) + _pt_key(end)
+    
+    def get_route(self, start: Tuple[float, float], end: Tuple[float, float],
+                  service: str, profile: str = "driving") -> Optional[RouteResult]:
+        """Get cached route result"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT distance, duration, geometry, timestamp FROM routes WHERE key = ?",
+                (self._key(start, end, service, profile),)
+            ).fetchone()
+        
+        if row is None:
+            return None
+        distance, duration, geometry, timestamp = row
+        if self.cache_ttl is not None and time.time() - timestamp >= self.cache_ttl:
+            return None
+        
+        return RouteResult(
+            distance=distance,
+            duration=duration,
+            geometry=RouteResult.unpack_geometry(geometry),
+            status="success"
+        )
+    
+    def set_route(self, start: Tuple[float, float], end: Tuple[float, float],
+                  service: str, result: RouteResult, profile: str = "driving"):
+        """Cache a successful route result"""
+        if result.status != "success":
+            return
+        geometry = RouteResult.pack_geometry(result.geometry)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO routes VALUES (?, ?, ?, ?, ?)",
+                (self._key(start, end, service, profile), result.distance, result.duration,
+                 geometry, time.time())
+            )
+            self._conn.commit()
+    
+    def purge_expired(self):
+        """Delete rows older than cache_ttl (run on startup; stale hits are refetched and replaced)"""
+        if self.cache_ttl is None:
+            return
+        with self._lock:
+            deleted = self._conn.execute(
+                "DELETE FROM routes WHERE timestamp <= ?", (time.time() - self.cache_ttl,)
+            ).rowcount
+            self._conn.commit()
+        if deleted:
+            logger.info(f"Purged {deleted} expired routes from disk cache")
+    
+    def clear_cache(self):
+        """Remove all cached routes"""
+        with self._lock:
+            self._conn.execute("DELETE FROM routes")
+            self._conn.commit()
+    
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
 # Global cache instance
 _cache_instance: Optional[RoutingCache] = None
+_disk_cache_instance: Optional[RouteDiskCache] = None
 
 def get_cache_instance(cache_dir: str = "cache", cache_ttl: int = 3600) -> RoutingCache:
     """Get or create global cache instance"""
     global _cache_instance
     if _cache_instance is None:
         _cache_instance = RoutingCache(cache_dir, cache_ttl)
-    return _cache_instance
\ No newline at end of file
+    return _cache_instance
+
+def get_route_disk_cache(db_path: str = os.path.join("cache", "routes.db"),
+                         cache_ttl: Optional[int] = None) -> RouteDiskCache:
+    """Get or create global route disk cache instance"""
+    global _disk_cache_instance
+    if _disk_cache_instance is None:
+        _disk_cache_instance = RouteDiskCache(db_path, cache_ttl)
+    return _disk_cache_instance
@@ -4,6 +4,8 @@ Contains test cases of various sizes for quantum and classical comparison.
 """
 
 import numpy as np
+from scipy.spatial.distance import cdist, pdist, squareform
+from functools import cached_property
 from typing import Dict, List, Tuple, Any
 
 class VRPTestCase:
@@ -15,22 +17,20 @@ class VRPTestCase:
         self.locations = locations
         self.num_vehicles = num_vehicles
         self.depot_index = depot_index
-        self.distance_matrix = self._calculate_distance_matrix()
         self.num_locations = len(locations)
     
+    @cached_property
+    def distance_matrix(self) -> np.ndarray:
+        """Distance matrix, computed on first access so unused cases cost nothing"""
+        return self._calculate_distance_matrix()
+    
     def _calculate_distance_matrix(self) -> np.ndarray:
         """Calculate Euclidean distance matrix between all locations"""
-        n = len(self.locations)
-        distances = np.zeros((n, n))
-        
-        for i in range(n):
-            for j in range(n):
-                if i != j:
-                    x1, y1 = self.locations[i]
-                    x2, y2 = self.locations[j]
-                    distances[i][j] = np.sqrt((x2 - x1)**2 + (y2 - y1)**2)
-        
-        return distances
+        points = np.asarray(self.locations, dtype=np.float64).reshape(-1, 2)
+        if len(points) > 64:
+            # Large cases: compute each symmetric pair once in C, then mirror
+            return squareform(pdist(points))
+        return cdist(points, points)
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert test case to dictionary for API responses"""
@@ -136,12 +136,9 @@ def create_random_test_case(num_locations: int, num_vehicles: int,
         np.random.seed(seed)
     
     # Generate random locations in a 10x10 grid
-    locations = [(0.0, 0.0)]  # Depot at origin
-    
-    for i in range(num_locations - 1):
-        x = np.random.uniform(0, 10)
-        y = np.random.uniform(0, 10)
-        locations.append((float(x), float(y)))
+    # Drawn row by row, so seeded cases match the previous per-point sampling
+    points = np.random.uniform(0, 10, (max(num_locations - 1, 0), 2))
+    locations = [(0.0, 0.0)] + [(x, y) for x, y in points.tolist()]  # Depot at origin
     
     return VRPTestCase(
         name=f"Random_{num_locations}_{num_vehicles}",
@@ -161,52 +158,39 @@ def validate_solution(test_case: VRPTestCase, solution: List[List[int]]) -> Dict
         Dictionary with validation results and metrics
     """
     depot = test_case.depot_index
-    distances = test_case.distance_matrix
+    distances = np.asarray(test_case.distance_matrix)
     
     # Validation checks
     all_customers = set(range(1, test_case.num_locations))  # Exclude depot
-    visited_customers = set()
     
     total_cost = 0.0
     route_costs = []
     
     for route_idx, route in enumerate(solution):
-        route_cost = 0.0
-        
         # Each route should start and end at depot
         if not route or route[0] != depot:
             route = [depot] + route
         if route[-1] != depot:
             route = route + [depot]
         
-        # Calculate route cost
-        for i in range(len(route) - 1):
-            from_loc = route[i]
-            to_loc = route[i + 1]
-            route_cost += distances[from_loc][to_loc]
+        # Calculate route cost: gather every leg with one fancy-indexing lookup
+        stops = np.asarray(route, dtype=np.intp)
+        route_cost = float(distances[stops[:-1], stops[1:]].sum())
         
         route_costs.append(route_cost)
         total_cost += route_cost
-        
-        # Track visited customers
-        for loc in route[1:-1]:  # Exclude depot visits
-            if loc != depot:
-                visited_customers.add(loc)
+    
+    # Count visits per customer in one pass (depot visits excluded)
+    visits = np.fromiter((loc for route in solution for loc in route), dtype=np.intp)
+    visits = visits[visits != depot]
+    counts = np.bincount(visits, minlength=test_case.num_locations)
     
     # Check if all customers are visited
+    visited_customers = set(np.flatnonzero(counts).tolist())
     unvisited = all_customers - visited_customers
-    duplicate_visits = []
     
     # Check for duplicate visits
-    customer_visits = {}
-    for route in solution:
-        for loc in route:
-            if loc != depot:
-                customer_visits[loc] = customer_visits.get(loc, 0) + 1
-    
-    for customer, count in customer_visits.items():
-        if count > 1:
-            duplicate_visits.append(customer)
+    duplicate_visits = np.flatnonzero(counts > 1).tolist()
     
     is_valid = len(unvisited) == 0 and len(duplicate_visits) == 0
     
@@ -5,18 +5,28 @@ Converts VRP to QUBO formulation and solves using quantum circuits.
 
 import numpy as np
 import time
-from typing import Dict, List, Tuple, Any, Optional
-from collections import defaultdict
+from typing import Callable, Dict, List, NamedTuple, Tuple, Any, Optional
 import itertools
+import logging
+import multiprocessing
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from functools import lru_cache
+from multiprocessing import shared_memory
+
+import xxhash
 
 # Qiskit imports
 from qiskit import QuantumCircuit, ClassicalRegister, QuantumRegister
+from qiskit.circuit import ParameterVector
 from qiskit_aer import AerSimulator
 from qiskit.transpiler.preset_passmanagers import generate_preset_pass_manager
 from qiskit_algorithms.optimizers import SPSA, COBYLA
-from qiskit.quantum_info import SparsePauliOp
-from qiskit_algorithms.minimum_eigensolvers import QAOA
-from qiskit.primitives import Sampler
+from qiskit.quantum_info import SparsePauliOp, PauliList
+from qiskit.primitives import Estimator
+from scipy.optimize import OptimizeResult
 
 
 # Local imports
@@ -24,14 +34,72 @@ from optimizers import create_optimizer, QuantumOptimizer
 from classical_solver import solve_vrp_classical
 from sample_data import VRPTestCase, validate_solution
 
+logger = logging.getLogger(__name__)
+
+class _ConstraintStructure(NamedTuple):
+    """Distance-independent penalty terms of the VRP QUBO, per unit penalty strength"""
+    linear: np.ndarray      # (num_qubits,) linear coefficients
+    quadratic: np.ndarray   # (num_qubits, num_qubits) upper-triangular coefficients
+    quad_i: np.ndarray      # nonzero (i, j) positions of quadratic, i < j
+    quad_j: np.ndarray
+    quad_z: np.ndarray      # symplectic Z rows of the ZZ terms, in quad_i/quad_j order
+
+@lru_cache(maxsize=32)
+def _constraint_structure(num_locations: int, num_vehicles: int, depot_index: int,
+                          edges_bytes: bytes) -> _ConstraintStructure:
+    """
+    Build the constraint penalty terms once per problem shape
+    
+    Only the edge set, vehicle count and depot matter, so problems that differ
+    only in their distances share the result. Arrays are read-only.
+    """
+    edges = np.frombuffer(edges_bytes, dtype=np.int32).reshape(-1, 2)
+    sources, targets = edges[:, 0], edges[:, 1]
+    num_qubits = len(edges)
+    customers = np.delete(np.arange(num_locations), depot_index)
+    
+    # Constraint incidence matrix: one row per (sum(row) - rhs)^2 penalty
+    # 1. each customer has exactly one outgoing edge
+    # 2. each customer has exactly one incoming edge
+    # 3. exactly num_vehicles edges leave the depot
+    incidence = np.vstack([
+        sources[None, :] == customers[:, None],
+        targets[None, :] == customers[:, None],
+        sources[None, :] == depot_index,
+    ]).astype(np.float32)
+    rhs = np.concatenate([np.ones(2 * len(customers)), [num_vehicles]]).astype(np.float32)
+    
+    # (sum - b)^2 = sum_i x_i (1 - 2b) + 2 * sum_{i<j} x_i x_j + b^2, using x_i^2 = x_i
+    linear = (1.0 - 2.0 * rhs) @ incidence
+    quadratic = 2.0 * np.triu(incidence.T @ incidence, 1)
+    quad_i, quad_j = np.nonzero(quadratic)
+    
+    # Qubit k of the QUBO is character k of the label, i.e. Qiskit qubit num_qubits-1-k
+    quad_z = np.zeros((len(quad_i), num_qubits), dtype=bool)
+    quad_z[np.arange(len(quad_i)), num_qubits - 1 - quad_i] = True
+    quad_z[np.arange(len(quad_i)), num_qubits - 1 - quad_j] = True
+    
+    structure = _ConstraintStructure(linear, quadratic, quad_i, quad_j, quad_z)
+    for array in structure:
+        array.flags.writeable = False
+    return structure
+
 class VRPQUBOFormulation:
     """Convert VRP to QUBO (Quadratic Unconstrained Binary Optimization) format"""
     
-    def __init__(self, distance_matrix: np.ndarray, num_vehicles: int, depot_index: int = 0):
-        self.distance_matrix = distance_matrix
+    def __init__(self, distance_matrix: np.ndarray, num_vehicles: int, depot_index: int = 0,
+                 prune_factor: Optional[float] = None):
+        """
+        Args:
+            prune_factor: If set, drop edges longer than prune_factor times the
+                median distance before assigning qubits (classical presolve)
+        """
+        # float32 is ample for route distances and halves the QUBO construction bandwidth
+        self.distance_matrix = np.asarray(distance_matrix, dtype=np.float32)
         self.num_vehicles = num_vehicles
         self.depot_index = depot_index
         self.num_locations = len(distance_matrix)
+        self.prune_factor = prune_factor
         
         # Variable indexing: x_ij = 1 if edge (i,j) is used
         self.var_index = {}
@@ -43,224 +111,160 @@ class VRPQUBOFormulation:
     
     def _create_variable_mapping(self):
         """Create mapping between variables x_ij and qubit indices"""
-        idx = 0
-        for i in range(self.num_locations):
-            for j in range(self.num_locations):
-                if i != j:  # No self-loops
-                    self.var_index[(i, j)] = idx
-                    self.index_to_var[idx] = (i, j)
-                    idx += 1
+        n = self.num_locations
+        
+        # Row q: the (i, j) edge encoded by qubit q, in row-major i != j order (no self-loops)
+        ii, jj = np.indices((n, n))
+        off_diagonal = ii != jj
+        kept = off_diagonal & self._kept_edge_mask()
+        self.edges = np.stack([ii[kept], jj[kept]], axis=1).astype(np.int32)
+        num_edges = len(self.edges)
+        
+        # Dict views of the same mapping
+        edge_list = list(map(tuple, self.edges.tolist()))
+        self.var_index = dict(zip(edge_list, range(num_edges)))
+        self.index_to_var = dict(enumerate(edge_list))
+        
+        # Same mapping as arrays, reused by every create_hamiltonian call
+        # (-1 marks self-loops and pruned edges)
+        self.var_idx = np.full((n, n), -1, dtype=np.int32)
+        self.var_idx[kept] = np.arange(num_edges, dtype=np.int32)
+    
+    def _kept_edge_mask(self) -> np.ndarray:
+        """
+        Edges that survive the distance presolve (all of them when prune_factor is None)
+        
+        Long edges rarely appear in near-optimal routes, and each dropped edge
+        halves the simulated statevector. Depot edges and every location's
+        cheapest outgoing/incoming edge are always kept so the constraints
+        stay satisfiable.
+        """
+        n = self.num_locations
+        if self.prune_factor is None or n < 3:
+            return np.ones((n, n), dtype=bool)
+        
+        distances = np.asarray(self.distance_matrix, dtype=np.float64)
+        off_diagonal = ~np.eye(n, dtype=bool)
+        kept = distances <= np.median(distances[off_diagonal]) * self.prune_factor
+        kept[self.depot_index, :] = True
+        kept[:, self.depot_index] = True
+        
+        masked = np.where(off_diagonal, distances, np.inf)
+        rows = np.arange(n)
+        kept[rows, masked.argmin(axis=1)] = True
+        kept[masked.argmin(axis=0), rows] = True
+        return kept
     
     def _estimate_penalty_strength(self) -> float:
         """Estimate appropriate penalty strength for constraints"""
-        max_distance = np.max(self.distance_matrix)
+        max_distance = float(np.max(self.distance_matrix))
         return max_distance * self.num_locations * 2
     
+    def qubo_coefficients(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Dense QUBO coefficients: linear vector h and upper-triangular matrix Q
+        
+        The objective (up to a constant) is h @ x + x @ Q @ x for binary x.
+        """
+        structure = self._constraint_structure()
+        return self._linear_coefficients(structure), self.penalty_strength * structure.quadratic
+    
+    def _constraint_structure(self) -> _ConstraintStructure:
+        """Cached penalty structure for this formulation's edge set"""
+        return _constraint_structure(self.num_locations, self.num_vehicles, self.depot_index,
+                                     self.edges.tobytes())
+    
+    def _linear_coefficients(self, structure: _ConstraintStructure) -> np.ndarray:
+        """Distance costs (one qubit per kept edge) plus the scaled linear penalties"""
+        distances = self.distance_matrix[self.edges[:, 0], self.edges[:, 1]]
+        return distances + self.penalty_strength * structure.linear
+    
+    def solve_exact(self) -> str:
+        """Minimize the QUBO by enumerating every bitstring (small problems only)"""
+        linear, quadratic = (c.astype(np.float64) for c in self.qubo_coefficients())
+        bitstrings = ((np.arange(1 << self.num_qubits)[:, None] >> np.arange(self.num_qubits)) & 1).astype(np.int8)
+        costs = ((bitstrings @ quadratic) * bitstrings).sum(axis=1) + bitstrings @ linear
+        return ''.join(map(str, bitstrings[np.argmin(costs)].tolist()))
+    
     def create_hamiltonian(self) -> SparsePauliOp:
         """
         Create the Hamiltonian for VRP as a QUBO problem
         H = H_cost + λ * H_constraints
         """
         
-        # Initialize coefficient dictionaries
-        linear_coeffs = defaultdict(float)
-        quadratic_coeffs = defaultdict(float)
-        
-        # Cost terms: minimize total distance
-        for i in range(self.num_locations):
-            for j in range(self.num_locations):
-                if i != j and (i, j) in self.var_index:
-                    qubit_idx = self.var_index[(i, j)]
-                    linear_coeffs[qubit_idx] += self.distance_matrix[i][j]
-        
-        # Constraint 1: Each customer must be visited exactly once (outgoing edges)
-        customers = [i for i in range(self.num_locations) if i != self.depot_index]
-        
-        for customer in customers:
-            # Sum of outgoing edges from customer should be 1
-            constraint_qubits = []
-            for j in range(self.num_locations):
-                if customer != j and (customer, j) in self.var_index:
-                    qubit_idx = self.var_index[(customer, j)]
-                    constraint_qubits.append(qubit_idx)
-            
-            # Add penalty: (sum - 1)^2 = sum^2 - 2*sum + 1
-            # Linear terms: -2*penalty_strength for each variable
-            for qubit_idx in constraint_qubits:
-                linear_coeffs[qubit_idx] -= 2 * self.penalty_strength
-            
-            # Quadratic terms: penalty_strength for each pair
-            for i_idx, qubit_i in enumerate(constraint_qubits):
-                for j_idx, qubit_j in enumerate(constraint_qubits):
-                    if qubit_i != qubit_j:
-                        key = tuple(sorted([qubit_i, qubit_j]))
-                        quadratic_coeffs[key] += self.penalty_strength
-                    else:  # Diagonal terms
-                        linear_coeffs[qubit_i] += self.penalty_strength
-        
-        # Constraint 2: Each customer must be visited exactly once (incoming edges)
-        for customer in customers:
-            # Sum of incoming edges to customer should be 1
-            constraint_qubits = []
-            for i in range(self.num_locations):
-                if customer != i and (i, customer) in self.var_index:
-                    qubit_idx = self.var_index[(i, customer)]
-                    constraint_qubits.append(qubit_idx)
-            
-            # Add penalty terms
-            for qubit_idx in constraint_qubits:
-                linear_coeffs[qubit_idx] -= 2 * self.penalty_strength
-            
-            for i_idx, qubit_i in enumerate(constraint_qubits):
-                for j_idx, qubit_j in enumerate(constraint_qubits):
-                    if qubit_i != qubit_j:
-                        key = tuple(sorted([qubit_i, qubit_j]))
-                        quadratic_coeffs[key] += self.penalty_strength
-                    else:
-                        linear_coeffs[qubit_i] += self.penalty_strength
-        
-        # Constraint 3: Vehicle capacity (each vehicle starts from depot)
-        depot_outgoing = []
-        for j in range(self.num_locations):
-            if j != self.depot_index and (self.depot_index, j) in self.var_index:
-                qubit_idx = self.var_index[(self.depot_index, j)]
-                depot_outgoing.append(qubit_idx)
-        
-        # Exactly num_vehicles should leave depot
-        for qubit_idx in depot_outgoing:
-            linear_coeffs[qubit_idx] -= 2 * self.num_vehicles * self.penalty_strength
-        
-        for i_idx, qubit_i in enumerate(depot_outgoing):
-            for j_idx, qubit_j in enumerate(depot_outgoing):
-                if qubit_i != qubit_j:
-                    key = tuple(sorted([qubit_i, qubit_j]))
-                    quadratic_coeffs[key] += self.penalty_strength
-                else:
-                    linear_coeffs[qubit_i] += self.penalty_strength
+        num_customers = self.num_locations - 1
+        structure = self._constraint_structure()
+        linear = self._linear_coefficients(structure)
+        quad_coeffs = self.penalty_strength * structure.quadratic[structure.quad_i, structure.quad_j]
         
-        # Convert to Pauli operators
-        pauli_list = []
+        lin_qubits = np.flatnonzero(np.abs(linear) > 1e-10)
+        quad_kept = np.flatnonzero(np.abs(quad_coeffs) > 1e-10)
+        n_lin, n_quad = len(lin_qubits), len(quad_kept)
         
-        # Linear terms (Z operators)
-        for qubit_idx, coeff in linear_coeffs.items():
-            if abs(coeff) > 1e-10:
-                pauli_str = ['I'] * self.num_qubits
-                pauli_str[qubit_idx] = 'Z'
-                pauli_list.append((''.join(pauli_str), coeff))
-        
-        # Quadratic terms (ZZ operators)
-        for (qubit_i, qubit_j), coeff in quadratic_coeffs.items():
-            if abs(coeff) > 1e-10:
-                pauli_str = ['I'] * self.num_qubits
-                pauli_str[qubit_i] = 'Z'
-                pauli_str[qubit_j] = 'Z'
-                pauli_list.append((''.join(pauli_str), coeff))
-        
-        # Constant term
-        constant = (self.penalty_strength * len(customers) * 2 + 
+        # Constant term, always emitted as the last (identity) row so the operator is never empty
+        constant = (self.penalty_strength * num_customers * 2 + 
                    self.penalty_strength * self.num_vehicles * self.num_vehicles)
-        if abs(constant) > 1e-10:
-            identity = 'I' * self.num_qubits
-            pauli_list.append((identity, constant))
         
-        if not pauli_list:
-            # If no terms, create a simple identity
-            identity = 'I' * self.num_qubits
-            pauli_list.append((identity, 0.0))
+        # Convert to Pauli operators directly in symplectic form (Z-only, so x stays False).
+        # Qubit k of the QUBO is character k of the label, i.e. Qiskit qubit num_qubits-1-k.
+        z = np.zeros((n_lin + n_quad + 1, self.num_qubits), dtype=bool)
+        x = np.zeros_like(z)
+        last = self.num_qubits - 1
         
-        return SparsePauliOp.from_list(pauli_list)
+        # Linear terms (Z operators)
+        z[np.arange(n_lin), last - lin_qubits] = True
+        
+        # Quadratic terms (ZZ operators), from the cached structure
+        z[n_lin:n_lin + n_quad] = structure.quad_z[quad_kept]
+        
+        coeffs = np.concatenate([linear[lin_qubits], quad_coeffs[quad_kept], [constant]])
+        return SparsePauliOp(PauliList.from_symplectic(z, x), coeffs.astype(np.complex128))
     
     def decode_solution(self, bit_string: str) -> List[List[int]]:
         """Decode quantum bit string into multiple VRP routes starting and ending at depot"""
         
         # Step 1: Parse active edges from bitstring
-        active_edges = [
-            self.index_to_var[i]
-            for i, bit in enumerate(bit_string)
-            if bit == '1' and i in self.index_to_var
-        ]
+        bits = np.frombuffer(bit_string.encode(), dtype=np.uint8)[:self.num_qubits] == ord('1')
+        active_edges = self.edges[:len(bits)][bits]
         
-        print(f"Active edges from bitstring: {active_edges}")
+        logger.debug("Active edges from bitstring: %s", active_edges.tolist())
         
-        # Step 2: Build directed graph
-        graph = defaultdict(list)
-        for i, j in active_edges:
-            graph[i].append(j)
+        # Step 2: Build directed graph as CSR adjacency (edges are sorted by source)
+        adj_flat = active_edges[:, 1]
+        adj_offsets = np.zeros(self.num_locations + 1, dtype=np.intp)
+        np.cumsum(np.bincount(active_edges[:, 0], minlength=self.num_locations), out=adj_offsets[1:])
         
-        print(f"Built graph: {dict(graph)}")
+        if logger.isEnabledFor(logging.DEBUG):
+            graph = {i: adj_flat[adj_offsets[i]:adj_offsets[i + 1]].tolist()
+                     for i in range(self.num_locations) if adj_offsets[i + 1] > adj_offsets[i]}
+            logger.debug("Built graph: %s", graph)
         
         # Step 3: Extract optimal routes starting from depot
         routes = []
-        visited = set()
+        visited = np.zeros(self.num_locations, dtype=bool)
         
         # Start with depot outgoing edges
-        depot_outgoing = graph.get(self.depot_index, [])
-        print(f"Depot outgoing edges: {depot_outgoing}")
+        depot_outgoing = adj_flat[adj_offsets[self.depot_index]:adj_offsets[self.depot_index + 1]].tolist()
+        logger.debug("Depot outgoing edges: %s", depot_outgoing)
         
         # Create routes by following the graph structure
         for start_node in depot_outgoing:
-            if start_node in visited:
+            if visited[start_node]:
                 continue
-                
-            route = [self.depot_index]
-            current = start_node
-            route_length = 0
-            max_route_length = self.num_locations  # Prevent infinite loops
             
-            while current != self.depot_index and current not in visited and route_length < max_route_length:
-                route.append(current)
-                visited.add(current)
-                route_length += 1
-                
-                # Find next node (prefer depot if available, otherwise take best next customer)
-                next_nodes = graph.get(current, [])
-                if not next_nodes:
-                    break
-                    
-                # Try to find depot first
-                next_node = None
-                for n in next_nodes:
-                    if n == self.depot_index:
-                        next_node = n
-                        break
-                
-                # If no depot connection, find the best next customer
-                if next_node is None:
-                    # Find unvisited customers that can be reached
-                    unvisited_candidates = [n for n in next_nodes if n not in visited]
-                    if unvisited_candidates:
-                        # Choose the closest unvisited customer
-                        next_node = min(unvisited_candidates, 
-                                      key=lambda x: self.distance_matrix[current][x])
-                    else:
-                        # If no unvisited customers, try to go back to depot
-                        depot_candidates = [n for n in next_nodes if n == self.depot_index]
-                        if depot_candidates:
-                            next_node = self.depot_index
-                        else:
-                            # Take any available node to avoid getting stuck
-                            next_node = next_nodes[0]
-                
-                if next_node is None:
-                    break
-                    
-                current = next_node
-            
-            # Close the route if we can reach depot
-            if current == self.depot_index:
-                route.append(self.depot_index)
+            route = self._extract_route(start_node, adj_offsets, adj_flat, visited)
             
             # Only add routes that have at least depot -> customer -> depot
             if len(route) > 2:
                 routes.append(route)
-                print(f"Created route: {route}")
+                logger.debug("Created route: %s", route)
         
         # Step 4: Handle unvisited customers by adding them to existing routes or creating new ones
-        all_customers = set(range(self.num_locations)) - {self.depot_index}
-        missed = all_customers - visited
+        visited[self.depot_index] = True
+        missed = set(np.flatnonzero(~visited).tolist())
         
         if missed:
-            print(f"Missed customers: {missed}")
+            logger.debug("Missed customers: %s", missed)
             
             # Try to add missed customers to existing routes
             for customer in missed:
@@ -271,9 +275,9 @@ class VRPQUBOFormulation:
                 for i, route in enumerate(routes):
                     if len(route) < self.num_locations:  # Route not too long
                         # Try inserting after depot
-                        insertion_cost = (self.distance_matrix[route[0]][customer] + 
-                                        self.distance_matrix[customer][route[1]] - 
-                                        self.distance_matrix[route[0]][route[1]])
+                        insertion_cost = (self.distance_matrix[route[0], customer] + 
+                                        self.distance_matrix[customer, route[1]] - 
+                                        self.distance_matrix[route[0], route[1]])
                         
                         if insertion_cost < best_insertion_cost:
                             best_insertion_cost = insertion_cost
@@ -283,68 +287,344 @@ class VRPQUBOFormulation:
                     # Insert into existing route
                     route = routes[best_route_idx]
                     route.insert(1, customer)  # Insert after depot
-                    print(f"Added customer {customer} to route {best_route_idx}: {route}")
+                    logger.debug("Added customer %s to route %s: %s", customer, best_route_idx, route)
                 else:
                     # Create new route for this customer
                     new_route = [self.depot_index, customer, self.depot_index]
                     routes.append(new_route)
-                    print(f"Created new route for customer {customer}: {new_route}")
+                    logger.debug("Created new route for customer %s: %s", customer, new_route)
         
         # Step 5: Optimize routes by trying to merge short routes
         if len(routes) > self.num_vehicles:
-            print(f"Too many routes ({len(routes)}), trying to merge...")
+            logger.debug("Too many routes (%s), trying to merge...", len(routes))
             routes = self._merge_routes(routes)
         
-        print(f"Final routes: {routes}")
+        logger.debug("Final routes: %s", routes)
         return routes
     
-    def _merge_routes(self, routes: List[List[int]]) -> List[List[int]]:
-        """Try to merge routes to reduce the number of routes"""
-        if len(routes) <= self.num_vehicles:
-            return routes
-        
-        # Sort routes by length (shorter routes first)
-        routes.sort(key=len)
-        
-        merged_routes = []
-        used_routes = set()
+    def _extract_route(self, start_node: int, adj_offsets: np.ndarray, adj_flat: np.ndarray,
+                       visited: np.ndarray) -> List[int]:
+        """Follow active edges from start_node back towards the depot, marking visited customers"""
+        depot = self.depot_index
+        route = [depot]
+        current = start_node
+        route_length = 0
+        max_route_length = self.num_locations  # Prevent infinite loops
         
-        for i, route1 in enumerate(routes):
-            if i in used_routes:
-                continue
-                
-            current_route = route1.copy()
-            used_routes.add(i)
+        while current != depot and not visited[current] and route_length < max_route_length:
+            route.append(current)
+            visited[current] = True
+            route_length += 1
             
-            # Try to merge with other routes
-            for j, route2 in enumerate(routes[i+1:], i+1):
-                if j in used_routes:
-                    continue
-                    
-                # Check if we can merge these routes
-                if len(current_route) + len(route2) - 2 <= self.num_locations:  # -2 for depot overlap
-                    # Merge: route1 -> route2 (without duplicate depot)
-                    merged_route = current_route[:-1] + route2[1:]  # Remove duplicate depot
-                    
-                    # Check if merged route is valid (no duplicate customers)
-                    if len(set(merged_route)) == len(merged_route):
-                        current_route = merged_route
-                        used_routes.add(j)
-                        print(f"Merged routes {i} and {j}: {current_route}")
+            # Find next node (prefer depot if available, otherwise take best next customer)
+            next_nodes = adj_flat[adj_offsets[current]:adj_offsets[current + 1]]
+            if len(next_nodes) == 0:
+                break
+            
+            if (next_nodes == depot).any():
+                next_node = depot
+            else:
+                # Choose the closest unvisited customer
+                unvisited_candidates = next_nodes[~visited[next_nodes]]
+                if len(unvisited_candidates):
+                    next_node = int(unvisited_candidates[
+                        np.argmin(self.distance_matrix[current, unvisited_candidates])])
+                else:
+                    # Take any available node to avoid getting stuck
+                    next_node = int(next_nodes[0])
             
-            merged_routes.append(current_route)
+            current = next_node
+        
+        # Close the route if we can reach depot
+        if current == depot:
+            route.append(depot)
         
-        return merged_routes
+        return route
+    
+    def _merge_routes(self, routes: List[List[int]]) -> List[List[int]]:
+        """Try to merge routes to reduce the number of routes"""
+        return _merge_routes(routes, self.num_vehicles, self.num_locations, self.distance_matrix)
 
 
+def _merge_routes(routes: List[List[int]], num_vehicles: int, num_locations: int,
+                  distance_matrix: np.ndarray) -> List[List[int]]:
+    """
+    Merge routes end-to-start in Clarke-Wright savings order
+    
+    Joining route a onto route b saves d(tail_a, depot) + d(depot, head_b)
+    - d(tail_a, head_b). Every pairwise saving is computed in one NumPy
+    expression, then pairs are spliced best-first while they still save
+    distance or there are more routes than vehicles. Customer sets are
+    integer bitmasks, so the no-duplicate-customer check is a single AND.
+    """
+    if len(routes) <= num_vehicles:
+        return routes
+    
+    distance_matrix = np.asarray(distance_matrix)
+    depot = routes[0][0]
+    # Customers of each route, without the depot at either end
+    bodies = [route[1:-1] if route[-1] == depot else route[1:] for route in routes]
+    heads = np.fromiter((body[0] if body else depot for body in bodies), dtype=np.intp)
+    tails = np.fromiter((body[-1] if body else depot for body in bodies), dtype=np.intp)
+    
+    savings = (distance_matrix[tails, depot][:, None] + distance_matrix[depot, heads][None, :]
+               - distance_matrix[np.ix_(tails, heads)])
+    
+    # Chains only ever grow, so a pair that is already too long or already
+    # shares a customer can never be spliced; drop those (and i == j) up
+    # front so the Python walk below only sees live candidates
+    num_routes = len(routes)
+    lengths = np.fromiter((len(body) for body in bodies), dtype=np.intp, count=num_routes)
+    membership = np.zeros((num_routes, num_locations), dtype=np.float32)
+    membership[np.repeat(np.arange(num_routes), lengths),
+               np.fromiter((c for body in bodies for c in body), dtype=np.intp)] = 1.0
+    feasible = ((lengths[:, None] + lengths[None, :] + 2 <= num_locations)  # +2 for the depot at both ends
+                & (membership @ membership.T == 0))
+    np.fill_diagonal(feasible, False)
+    order = np.argsort(-savings, axis=None, kind='stable')
+    order = order[feasible.ravel()[order]]
+    
+    # Each merged chain is tracked through its first route: the chain's
+    # last route, combined length and customer mask, plus every route's chain
+    chain_of = list(range(num_routes))
+    chain_tail = list(range(num_routes))
+    next_route = [-1] * num_routes
+    chain_len = lengths.tolist()
+    chain_mask = [sum(1 << c for c in set(body)) for body in bodies]
+    num_chains = num_routes
+    
+    for flat in order.tolist():
+        a, b = divmod(flat, num_routes)
+        if savings[a, b] <= 0 and num_chains <= num_vehicles:
+            break
+        chain_a, chain_b = chain_of[a], chain_of[b]
+        # a must end its chain, b must start a different one
+        if chain_tail[chain_a] != a or chain_b != b or chain_a == chain_b:
+            continue
+        if (chain_len[chain_a] + chain_len[b] + 2 > num_locations  # +2 for the depot at both ends
+                or chain_mask[chain_a] & chain_mask[b]):
+            continue
+        
+        next_route[a] = b
+        chain_tail[chain_a] = chain_tail[b]
+        chain_len[chain_a] += chain_len[b]
+        chain_mask[chain_a] |= chain_mask[b]
+        route = b
+        while route != -1:
+            chain_of[route] = chain_a
+            route = next_route[route]
+        num_chains -= 1
+        logger.debug("Merged routes %s and %s (saving %.3f)", a, b, savings[a, b])
+        if num_chains == 1:
+            break  # Nothing left to splice onto
+    
+    merged_routes = []
+    for first in range(num_routes):
+        if chain_of[first] != first:
+            continue
+        if next_route[first] == -1:
+            merged_routes.append(routes[first])
+            continue
+        merged = [depot]
+        route = first
+        while route != -1:
+            merged.extend(bodies[route])
+            route = next_route[route]
+        merged.append(depot)
+        merged_routes.append(merged)
+    
+    return merged_routes
+
+@lru_cache(maxsize=16)
+def _dummy_coordinates(num_locations: int) -> Tuple[Tuple[float, float], ...]:
+    """Placeholder (i, i) coordinates, shared across solves of the same size"""
+    return tuple((float(i), float(i)) for i in range(num_locations))
+
+def _routes_cost(distance_matrix: np.ndarray, routes: List[List[int]]) -> float:
+    """Total length of all routes, gathered with one fancy-indexing lookup"""
+    legs = [(route[k], route[k + 1]) for route in routes for k in range(len(route) - 1)]
+    if not legs:
+        return 0.0
+    src, dst = np.asarray(legs, dtype=np.intp).T
+    return float(np.asarray(distance_matrix)[src, dst].sum())
+
+# Largest QUBO that is simulated classically
+MAX_SIMULATED_QUBITS = 20
+
+# Largest QUBO minimized by enumeration in "exact" mode (2^N bitstrings)
+EXACT_MAX_QUBITS = 18
+
+@dataclass(frozen=True, slots=True)
+class _ValidationCase:
+    """Minimal stand-in for VRPTestCase accepted by validate_solution"""
+    distance_matrix: np.ndarray
+    num_locations: int
+    depot_index: int
+
+class _ProblemKey:
+    """Hashable, read-only snapshot of a distance matrix, keyed by an xxh3-128 digest of its buffer"""
+    
+    __slots__ = ('matrix', 'digest')
+    
+    def __init__(self, distance_matrix: np.ndarray):
+        self.matrix = np.array(distance_matrix, dtype=np.float64, order='C')
+        self.matrix.flags.writeable = False
+        hasher = xxhash.xxh3_128(struct.pack('<' + 'q' * self.matrix.ndim, *self.matrix.shape))
+        hasher.update(memoryview(self.matrix))
+        self.digest = hasher.intdigest()
+    
+    def __hash__(self) -> int:
+        return hash(self.digest)
+    
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, _ProblemKey) and self.digest == other.digest
+
+@lru_cache(maxsize=32)
+def _cached_hamiltonian(problem: _ProblemKey, num_vehicles: int, depot_index: int,
+                        prune_factor: Optional[float] = None
+                        ) -> Tuple[VRPQUBOFormulation, Optional[SparsePauliOp]]:
+    """
+    Build the QUBO formulation and its Hamiltonian once per distinct problem
+    
+    Keyed on the matrix digest, so repeated solves of the same problem
+    (e.g. one per optimizer in a comparison) share the result. The
+    Hamiltonian is None when the problem is too large to simulate.
+    """
+    qubo = VRPQUBOFormulation(problem.matrix, num_vehicles, depot_index, prune_factor)
+    if qubo.num_qubits > MAX_SIMULATED_QUBITS:
+        return qubo, None
+    return qubo, qubo.create_hamiltonian()
+
+@lru_cache(maxsize=32)
+def _cached_qaoa_ansatz(problem: _ProblemKey, num_vehicles: int, depot_index: int,
+                        p_layers: int, prune_factor: Optional[float] = None
+                        ) -> Tuple[QuantumCircuit, ParameterVector, ParameterVector]:
+    """
+    Build the parameterized QAOA circuit (no measurements) once per problem
+    
+    Returns the circuit with its gamma/beta parameter vectors.
+    """
+    qubo, hamiltonian = _cached_hamiltonian(problem, num_vehicles, depot_index, prune_factor)
+    gammas = ParameterVector('g', p_layers)
+    betas = ParameterVector('b', p_layers)
+    
+    qc = QuantumCircuit(qubo.num_qubits)
+    
+    # Initial superposition
+    qc.h(range(qubo.num_qubits))
+    
+    # Cost unitary terms from the Hamiltonian: Z rows -> rz, ZZ rows -> rzz.
+    # Identity rows are a global phase and are skipped.
+    z_terms = np.asarray(hamiltonian.paulis.z, dtype=bool)
+    term_coeffs = np.asarray(hamiltonian.coeffs).real
+    term_weights = z_terms.sum(axis=1)
+    single_rows = np.flatnonzero(term_weights == 1)
+    pair_rows = np.flatnonzero(term_weights == 2)
+    single_gates = list(zip(np.nonzero(z_terms[single_rows])[1].tolist(),
+                            term_coeffs[single_rows].tolist()))
+    pair_gates = list(zip(np.nonzero(z_terms[pair_rows])[1].reshape(-1, 2).tolist(),
+                          term_coeffs[pair_rows].tolist()))
+    
+    # Apply QAOA layers (simplified)
+    for layer in range(p_layers):
+        # Cost unitary exp(-i*gamma*H)
+        for q, coeff in single_gates:
+            qc.rz(2 * coeff * gammas[layer], q)
+        for (q1, q2), coeff in pair_gates:
+            qc.rzz(2 * coeff * gammas[layer], q1, q2)
+        
+        # Simple mixer unitary (just X rotations)
+        for i in range(qubo.num_qubits):
+            qc.rx(betas[layer], i)
+    
+    return qc, gammas, betas
+
+@lru_cache(maxsize=32)
+def _cached_fallback_circuit(problem: _ProblemKey, num_vehicles: int, depot_index: int,
+                             p_layers: int, prune_factor: Optional[float] = None
+                             ) -> Tuple[QuantumCircuit, ParameterVector, ParameterVector]:
+    """
+    Transpile the QAOA ansatz for the sampling run once per problem
+    
+    Returns the transpiled circuit with its gamma/beta parameter vectors;
+    callers only bind angle values before running it.
+    """
+    ansatz, gammas, betas = _cached_qaoa_ansatz(problem, num_vehicles, depot_index,
+                                                p_layers, prune_factor)
+    qc = ansatz.copy()
+    
+    # Exact outcome probabilities instead of sampled counts
+    qc.save_probabilities()
+    
+    pass_manager = generate_preset_pass_manager(optimization_level=3, backend=AerSimulator())
+    return pass_manager.run(qc), gammas, betas
+
+# Above this many qubits the fallback circuit runs on the matrix product state method
+MPS_QUBIT_THRESHOLD = 18
+
+@lru_cache(maxsize=None)
+def _gpu_available() -> bool:
+    """Whether this Aer build can run on a CUDA device"""
+    try:
+        return 'GPU' in AerSimulator().available_devices()
+    except Exception:
+        return False
+
+@lru_cache(maxsize=8)
+def _cached_simulator(method: str, device: str, seed: int) -> AerSimulator:
+    """Shared simulator per configuration, reused across solver instances"""
+    return AerSimulator(method=method, device=device, seed_simulator=seed)
+
 class QAOAVRPSolver:
     """QAOA-based VRP solver"""
     
-    def __init__(self, p_layers: int = 2, shots: int = 1024, seed: int = 42):
+    def __init__(self, p_layers: int = 2, shots: int = 1024, seed: int = 42,
+                 sim_method: Optional[str] = None, device: Optional[str] = None,
+                 prune_factor: Optional[float] = None, mode: str = "qaoa"):
+        """
+        Args:
+            sim_method: Aer simulation method; chosen per circuit size when None
+            device: Aer device ("CPU"/"GPU"); GPU is used when available if None
+            prune_factor: Edge-pruning presolve factor (see VRPQUBOFormulation)
+            mode: "qaoa", or "exact" to brute-force QUBOs of up to EXACT_MAX_QUBITS qubits
+        """
         self.p_layers = p_layers
         self.shots = shots
         self.seed = seed
-        self.simulator = AerSimulator(seed_simulator=seed)
+        self.sim_method = sim_method
+        self.device = device
+        self.prune_factor = prune_factor
+        self.mode = mode
+        self.simulator = self._get_simulator(0)
+        
+        # Exact expectation values; built once and reused by every solve()
+        self._estimator = Estimator()
+    
+    def _initial_point(self, hamiltonian: SparsePauliOp) -> np.ndarray:
+        """
+        Deterministic warm start from the linear TQA (annealing) schedule
+        
+        gamma ramps up while beta ramps down. gamma is divided by the largest
+        non-identity coefficient so the first cost layer rotates by at most
+        ~1 rad however large the penalty weights are.
+        """
+        coeffs = np.abs(np.asarray(hamiltonian.coeffs).real)
+        non_identity = np.asarray(hamiltonian.paulis.z).any(axis=1)
+        scale = coeffs[non_identity].max() if non_identity.any() else 1.0
+        gammas = np.linspace(0.1, 0.8, self.p_layers) / max(scale, 1e-12)
+        betas = np.linspace(0.8, 0.1, self.p_layers)
+        return np.concatenate([gammas, betas])
+    
+    def _get_simulator(self, num_qubits: int) -> AerSimulator:
+        """Pick the simulator for a circuit of the given width"""
+        method = self.sim_method
+        if method is None:
+            method = "matrix_product_state" if num_qubits > MPS_QUBIT_THRESHOLD else "automatic"
+        device = self.device
+        if device is None:
+            # The matrix product state method is CPU-only
+            device = "GPU" if method != "matrix_product_state" and _gpu_available() else "CPU"
+        return _cached_simulator(method, device, self.seed)
         
     def solve(self, distance_matrix: np.ndarray, num_vehicles: int, 
               optimizer_name: str = 'SPSA', depot_index: int = 0,
@@ -373,122 +653,114 @@ class QAOAVRPSolver:
         qubo = None
         
         try:
-            print(f"Starting QAOA with {optimizer_name}, {self.p_layers} layers, {self.shots} shots")
+            logger.info("Starting QAOA with %s, %s layers, %s shots", optimizer_name, self.p_layers, self.shots)
             
-            # Create QUBO formulation
-            qubo = VRPQUBOFormulation(distance_matrix, num_vehicles, depot_index)
+            # Create QUBO formulation (cached per distinct problem)
+            problem = _ProblemKey(distance_matrix)
+            case = _ValidationCase(problem.matrix, len(problem.matrix), depot_index)
+            qubo, hamiltonian = _cached_hamiltonian(problem, num_vehicles, depot_index, self.prune_factor)
             
-            if qubo.num_qubits > 20:  # Limit for classical simulation
-                raise ValueError(f"Problem too large: {qubo.num_qubits} qubits needed (max 20)")
+            if qubo.num_qubits > MAX_SIMULATED_QUBITS:  # Limit for classical simulation
+                raise ValueError(f"Problem too large: {qubo.num_qubits} qubits needed (max {MAX_SIMULATED_QUBITS})")
             
-            print(f"Problem size: {qubo.num_qubits} qubits")
+            logger.debug("Problem size: %s qubits", qubo.num_qubits)
             
-            # Create Hamiltonian
-            hamiltonian = qubo.create_hamiltonian()
-            print("Hamiltonian created successfully")
+            logger.debug("Hamiltonian created successfully")
             
-            # Create quantum optimizer
-            print(f"Creating optimizer {optimizer_name}...")
-            try:
-                quantum_optimizer = create_optimizer(optimizer_name, maxiter=maxiter)
-                print(f"Optimizer {optimizer_name} created successfully")
-            except Exception as optimizer_error:
-                print(f"Failed to create optimizer {optimizer_name}: {optimizer_error}")
-                raise Exception(f"Optimizer creation failed: {optimizer_error}")
+            if self.mode == "exact" and qubo.num_qubits <= EXACT_MAX_QUBITS:
+                # Small enough to minimize the QUBO directly; no circuit simulation needed
+                logger.debug("Solving QUBO exactly by enumeration...")
+                best_bitstring = qubo.solve_exact()
+                routes = qubo.decode_solution(best_bitstring)
+            else:
+                # Create quantum optimizer
+                logger.debug("Creating optimizer %s...", optimizer_name)
+                try:
+                    quantum_optimizer = create_optimizer(optimizer_name, maxiter=maxiter)
+                    logger.debug("Optimizer %s created successfully", optimizer_name)
+                except Exception as optimizer_error:
+                    logger.error("Failed to create optimizer %s: %s", optimizer_name, optimizer_error)
+                    raise Exception(f"Optimizer creation failed: {optimizer_error}")
             
-            # Setup QAOA
-            print("Setting up QAOA...")
-            sampler = Sampler()
-            qaoa = QAOA(sampler, quantum_optimizer, reps=self.p_layers)
-            print("QAOA setup completed")
+                # Exact <psi|H|psi> objective over the QAOA ansatz; x = [gammas..., betas...]
+                ansatz, gammas, betas = _cached_qaoa_ansatz(problem, num_vehicles, depot_index,
+                                                            self.p_layers, self.prune_factor)
+                position = {param: i for i, param in enumerate(list(gammas) + list(betas))}
+                param_order = np.array([position[param] for param in ansatz.parameters], dtype=np.intp)
             
-            # Solve
-            print("Running QAOA optimization...")
-            result = qaoa.compute_minimum_eigenvalue(hamiltonian)
-            print(f"QAOA completed. Optimal value: {result.optimal_value}")
+                def energy(x: np.ndarray) -> float:
+                    values = np.asarray(x, dtype=np.float64)[param_order]
+                    job = self._estimator.run([ansatz], [hamiltonian], [values])
+                    return float(job.result().values[0])
             
-            # Try to get the best bit string from result
-            if hasattr(result, 'best_measurement') and result.best_measurement:
-                print("Using best_measurement from result")
-                best_bitstring = result.best_measurement['bitstring']
-                routes = qubo.decode_solution(best_bitstring)
-                quantum_success = True
-                print(f"Decoded routes from best_measurement: {routes}")
+                initial_point = self._initial_point(hamiltonian)
             
-            # If no best_measurement, try to sample from optimized circuit
-            if not routes:
-                print("No best_measurement, trying to sample from optimized circuit...")
-                
-                # Get optimal parameters
-                if hasattr(result, 'optimal_point'):
-                    optimal_point = result.optimal_point
-                elif hasattr(result, 'optimal_parameters'):
-                    optimal_point = result.optimal_parameters
+                # Solve
+                logger.debug("Running QAOA optimization...")
+                if hasattr(quantum_optimizer, 'minimize'):
+                    # Qiskit optimizers (SPSA, COBYLA, ADAM)
+                    opt_result = quantum_optimizer.minimize(fun=energy, x0=initial_point)
                 else:
-                    print("No optimal parameters found, using default values")
-                    optimal_point = [0.1] * (self.p_layers * 2)
-                
-                print(f"Optimal parameters: {optimal_point}")
-                
-                # Create and run the optimized circuit
-                qc = QuantumCircuit(qubo.num_qubits)
-                
-                # Initial superposition
-                qc.h(range(qubo.num_qubits))
+                    # Local optimizers (Ensemble, Adaptive, SciPy wrappers)
+                    opt_result = quantum_optimizer.optimize(energy, initial_point,
+                                                            [(0.0, 2 * np.pi)] * len(initial_point))
+                result = OptimizeResult(
+                    optimal_value=float(opt_result.fun),
+                    optimal_point=np.asarray(opt_result.x, dtype=np.float64),
+                    optimizer_evals=getattr(opt_result, 'nfev', None) or 0,
+                )
+                logger.info("QAOA completed. Optimal value: %s", result.optimal_value)
+            
+                # Sample the optimized circuit
+                if not routes:
+                    logger.debug("Sampling optimized circuit...")
+                    optimal_point = result.optimal_point
                 
-                # Apply QAOA layers (simplified)
-                for layer in range(self.p_layers):
-                    gamma = optimal_point[layer] if len(optimal_point) > layer else 0.1
-                    beta = optimal_point[self.p_layers + layer] if len(optimal_point) > self.p_layers + layer else 0.1
-                    
-                    # Simple cost unitary (just Z rotations)
-                    for i in range(qubo.num_qubits):
-                        qc.rz(gamma, i)
-                    
-                    # Simple mixer unitary (just X rotations)
-                    for i in range(qubo.num_qubits):
-                        qc.rx(beta, i)
+                    logger.debug("Optimal parameters: %s", optimal_point)
                 
-                # Measure
-                qc.measure_all()
+                    # Bind the optimized angles into the pre-transpiled template
+                    gamma_values = [optimal_point[layer] if len(optimal_point) > layer else 0.1
+                                    for layer in range(self.p_layers)]
+                    beta_values = [optimal_point[self.p_layers + layer] if len(optimal_point) > self.p_layers + layer else 0.1
+                                   for layer in range(self.p_layers)]
+                    template, gammas, betas = _cached_fallback_circuit(
+                        problem, num_vehicles, depot_index, self.p_layers, self.prune_factor)
+                    qc = template.assign_parameters({gammas: gamma_values, betas: beta_values})
                 
-                print("Running optimized circuit...")
-                # Run circuit
-                job = self.simulator.run(qc, shots=self.shots)
-                counts = job.result().get_counts()
-                print(f"Circuit results: {counts}")
+                    logger.debug("Running optimized circuit...")
+                    # Run circuit
+                    self.simulator = self._get_simulator(qubo.num_qubits)
+                    job = self.simulator.run(qc, shots=1)
+                    probabilities = np.asarray(job.result().data(0)['probabilities'])
                 
-                # Validate top bitstrings
-                top_bitstrings = sorted(counts.items(), key=lambda x: x[1], reverse=True)[:5]
-                print(f"Top bitstrings: {top_bitstrings}")
+                    # Validate the most likely bitstrings (basis index -> Qiskit big-endian bit order)
+                    top_k = min(5, len(probabilities))
+                    top_indices = np.argpartition(probabilities, -top_k)[-top_k:]
+                    top_indices = top_indices[np.argsort(probabilities[top_indices])[::-1]]
+                    top_bitstrings = [(format(int(idx), f'0{qubo.num_qubits}b'), float(probabilities[idx]))
+                                      for idx in top_indices]
+                    logger.debug("Top bitstrings: %s", top_bitstrings)
                 
-                for bitstring, freq in top_bitstrings:
-                    print(f"Testing bitstring: {bitstring}")
-                    candidate_routes = qubo.decode_solution(bitstring)
-                    print(f"Decoded routes: {candidate_routes}")
+                    for bitstring, probability in top_bitstrings:
+                        logger.debug("Testing bitstring: %s", bitstring)
+                        candidate_routes = qubo.decode_solution(bitstring)
+                        logger.debug("Decoded routes: %s", candidate_routes)
                     
-                    validation = validate_solution(
-                        type('TestCase', (), {
-                            'distance_matrix': distance_matrix,
-                            'num_locations': len(distance_matrix),
-                            'depot_index': depot_index
-                        })(),
-                        candidate_routes
-                    )
-                    print(f"Validation result: {validation}")
+                        validation = validate_solution(case, candidate_routes)
+                        logger.debug("Validation result: %s", validation)
                     
-                    if validation['is_valid']:
-                        routes = candidate_routes
-                        best_bitstring = bitstring
-                        quantum_success = True
-                        print(f"Valid solution found: {routes}")
-                        break
-
-                # Fallback if no valid bitstring found
-                if not routes:
-                    print("No valid solution found, using highest frequency bitstring")
-                    best_bitstring = max(counts.keys(), key=lambda x: counts[x])
-                    routes = qubo.decode_solution(best_bitstring)
+                        if validation['is_valid']:
+                            routes = candidate_routes
+                            best_bitstring = bitstring
+                            quantum_success = True
+                            logger.debug("Valid solution found: %s", routes)
+                            break
+
+                    # Fallback if no valid bitstring found
+                    if not routes:
+                        logger.debug("No valid solution found, using most likely bitstring")
+                        best_bitstring = top_bitstrings[0][0]
+                        routes = qubo.decode_solution(best_bitstring)
 
             # Ensure routes is not empty
             if not routes:
@@ -497,27 +769,14 @@ class QAOAVRPSolver:
             # OPTIMIZE AND VALIDATE ROUTES - ADD THIS LINE:
             routes = self._validate_and_optimize_routes(routes, distance_matrix, num_vehicles, depot_index)
             
-            print(f"Final optimized routes: {routes}")
-
-            # Calculate solution cost
-            total_cost = 0.0
-            for route in routes:
-                if len(route) >= 2:
-                    for i in range(len(route) - 1):
-                        total_cost += distance_matrix[route[i]][route[i+1]]
+            logger.debug("Final optimized routes: %s", routes)
+
+            # Validate solution; the same vectorized pass yields the solution cost
+            validation = validate_solution(case, routes)
+            total_cost = validation['total_cost']
             
             execution_time = time.time() - start_time
             
-            # Validate solution
-            validation = validate_solution(
-                type('TestCase', (), {
-                    'distance_matrix': distance_matrix,
-                    'num_locations': len(distance_matrix),
-                    'depot_index': depot_index
-                })(),
-                routes
-            )
-            
             # Add problem_info to the output
             problem_info = {
                 'locations': self._get_location_coordinates(distance_matrix),
@@ -526,12 +785,12 @@ class QAOAVRPSolver:
                 'qubits_needed': qubo.num_qubits
             }
             
-            print("Quantum solution successful!")
+            logger.info("Quantum solution successful!")
             return {
                 'solution': routes,
                 'total_cost': total_cost,
                 'execution_time': execution_time,
-                'algorithm': f'QAOA-{optimizer_name}',
+                'algorithm': f'QAOA-{optimizer_name}' if result is not None else 'QUBO-Exact',
                 'quantum_result': {
                     'optimal_value': result.optimal_value if result else 0.0,
                     'optimal_point': result.optimal_point.tolist() if result and hasattr(result, 'optimal_point') else [],
@@ -548,8 +807,8 @@ class QAOAVRPSolver:
             
         except Exception as e:
             # Fallback to classical solution if quantum fails
-            print(f"Quantum solver failed: {e}")
-            print("Falling back to classical solution...")
+            logger.warning("Quantum solver failed: %s", e)
+            logger.warning("Falling back to classical solution...")
             
             try:
                 classical_result = solve_vrp_classical(
@@ -568,7 +827,7 @@ class QAOAVRPSolver:
                 
                 return {
                     'solution': classical_result['solution'],
-                    'total_cost': classical_result['total_cost'],
+                    'total_cost': float(classical_result['total_cost']),
                     'execution_time': execution_time,
                     'algorithm': f'QAOA-{optimizer_name}-Fallback',
                     'error': str(e),
@@ -579,7 +838,7 @@ class QAOAVRPSolver:
                     'problem_info': problem_info
                 }
             except Exception as classical_error:
-                print(f"Classical fallback also failed: {classical_error}")
+                logger.error("Classical fallback also failed: %s", classical_error)
                 # Last resort: create a simple solution
                 execution_time = time.time() - start_time
                 
@@ -589,10 +848,7 @@ class QAOAVRPSolver:
                     simple_solution.append([0, i, 0])
                 
                 # Calculate cost
-                total_cost = 0.0
-                for route in simple_solution:
-                    for i in range(len(route) - 1):
-                        total_cost += distance_matrix[route[i]][route[i+1]]
+                total_cost = _routes_cost(distance_matrix, simple_solution)
                 
                 problem_info = {
                     'locations': self._get_location_coordinates(distance_matrix),
@@ -617,8 +873,7 @@ class QAOAVRPSolver:
     def _get_location_coordinates(self, distance_matrix: np.ndarray) -> List[List[float]]:
         """Generate dummy coordinates for locations (you can modify this based on your needs)"""
         # This is a placeholder - you might want to store actual coordinates
-        num_locations = len(distance_matrix)
-        return [[float(i), float(i)] for i in range(num_locations)]
+        return [list(point) for point in _dummy_coordinates(len(distance_matrix))]
     
     def test_basic_functionality(self, distance_matrix: np.ndarray, num_vehicles: int, depot_index: int = 0):
         """Test basic functionality without full QAOA"""
@@ -626,7 +881,7 @@ class QAOAVRPSolver:
             print("Testing basic functionality...")
             
             # Test QUBO creation
-            qubo = VRPQUBOFormulation(distance_matrix, num_vehicles, depot_index)
+            qubo = VRPQUBOFormulation(distance_matrix, num_vehicles, depot_index, self.prune_factor)
             print(f"QUBO created successfully with {qubo.num_qubits} qubits")
             
             # Test Hamiltonian creation
@@ -649,28 +904,25 @@ class QAOAVRPSolver:
         
         # Check if we have too many routes
         if len(routes) > num_vehicles:
-            print(f"Warning: {len(routes)} routes for {num_vehicles} vehicles")
+            logger.warning("%s routes for %s vehicles", len(routes), num_vehicles)
             
             # Try to merge routes
-            routes = self._merge_routes(routes)
+            routes = self._merge_routes(routes, num_vehicles, distance_matrix)
             
             # If still too many, create optimal routes
             if len(routes) > num_vehicles:
-                print("Creating optimal routes by combining customers...")
+                logger.debug("Creating optimal routes by combining customers...")
                 routes = self._create_optimal_routes(distance_matrix, num_vehicles, depot_index)
         
         # Ensure all customers are visited
-        all_customers = set(range(len(distance_matrix))) - {depot_index}
-        visited_customers = set()
-        
-        for route in routes:
-            for node in route[1:-1]:  # Exclude depot at start/end
-                if node != depot_index:
-                    visited_customers.add(node)
-        
-        missed_customers = all_customers - visited_customers
+        stops = np.fromiter((node for route in routes for node in route[1:-1]),  # Exclude depot at start/end
+                            dtype=np.intp)
+        visited_mask = np.zeros(len(distance_matrix), dtype=bool)
+        visited_mask[stops] = True
+        visited_mask[depot_index] = True
+        missed_customers = set(np.flatnonzero(~visited_mask).tolist())
         if missed_customers:
-            print(f"Adding missed customers: {missed_customers}")
+            logger.debug("Adding missed customers: %s", missed_customers)
             # Add missed customers to existing routes or create new ones
             routes = self._add_missed_customers(routes, missed_customers, distance_matrix, depot_index)
         
@@ -679,11 +931,9 @@ class QAOAVRPSolver:
     def _create_optimal_routes(self, distance_matrix: np.ndarray, num_vehicles: int, 
                               depot_index: int = 0) -> List[List[int]]:
         """Create optimal routes using nearest neighbor approach"""
-        num_locations = len(distance_matrix)
-        customers = [i for i in range(num_locations) if i != depot_index]
-        
-        # Sort customers by distance from depot
-        customers.sort(key=lambda x: distance_matrix[depot_index][x])
+        # Sort customers by distance from depot (stable, so ties keep index order)
+        order = np.argsort(np.asarray(distance_matrix)[depot_index], kind='stable')
+        customers = order[order != depot_index].tolist()
         
         routes = []
         customers_per_route = len(customers) // num_vehicles
@@ -706,71 +956,69 @@ class QAOAVRPSolver:
 
     def _add_missed_customers(self, routes: List[List[int]], missed_customers: set, 
                               distance_matrix: np.ndarray, depot_index: int = 0) -> List[List[int]]:
-        """Add missed customers to existing routes"""
-        for customer in missed_customers:
-            best_route_idx = -1
-            best_insertion_cost = float('inf')
-            
-            # Find the best route to insert this customer
-            for i, route in enumerate(routes):
-                if len(route) < len(distance_matrix):  # Route not too long
-                    # Try inserting after depot
-                    insertion_cost = (distance_matrix[route[0]][customer] + 
-                                    distance_matrix[customer][route[1]] - 
-                                    distance_matrix[route[0]][route[1]])
-                    
-                    if insertion_cost < best_insertion_cost:
-                        best_insertion_cost = insertion_cost
-                        best_route_idx = i
-            
-            if best_route_idx >= 0:
+        """
+        Add missed customers to existing routes, cheapest insertion first
+        
+        All (customer, route) insertion costs are scored in one cost matrix.
+        Each step places the globally cheapest pair and rescores only the
+        route that changed.
+        """
+        distance_matrix = np.asarray(distance_matrix)
+        num_locations = len(distance_matrix)
+        # Every route starts at the depot, so only each route's first stop
+        # varies in the insertion cost
+        depot_row = distance_matrix[depot_index]
+        missed = np.fromiter(missed_customers, dtype=np.intp, count=len(missed_customers))
+        seconds = np.fromiter((route[1] for route in routes), dtype=np.intp, count=len(routes))
+        lengths = np.fromiter((len(route) for route in routes), dtype=np.intp, count=len(routes))
+        
+        # Insert after depot on every route that is not too long
+        costs = (depot_row[missed][:, None] +
+                 distance_matrix[np.ix_(missed, seconds)] -
+                 depot_row[seconds][None, :]).astype(np.float64)
+        costs[:, lengths >= num_locations] = np.inf
+        placed = np.zeros(len(missed), dtype=bool)
+        
+        def route_costs(second: int, length: int) -> np.ndarray:
+            """Insertion cost of every missed customer in front of `second`"""
+            if length >= num_locations:
+                column = np.full(len(missed), np.inf)
+            else:
+                column = (depot_row[missed] + distance_matrix[missed, second]
+                          - depot_row[second]).astype(np.float64)
+            column[placed] = np.inf
+            return column
+        
+        for _ in range(len(missed)):
+            if costs.size:
+                customer_idx, route_idx = divmod(int(np.argmin(costs)), costs.shape[1])
+            if costs.size and costs[customer_idx, route_idx] < np.inf:
                 # Insert into existing route
-                route = routes[best_route_idx]
-                route.insert(1, customer)  # Insert after depot
+                customer = int(missed[customer_idx])
+                routes[route_idx].insert(1, customer)  # Insert after depot
+                seconds[route_idx] = customer
+                lengths[route_idx] += 1
+                placed[customer_idx] = True
+                costs[customer_idx, :] = np.inf
+                costs[:, route_idx] = route_costs(customer, lengths[route_idx])
             else:
-                # Create new route for this customer
+                # No route can take anyone: create new route for the next customer
+                customer_idx = int(np.argmin(placed))
+                customer = int(missed[customer_idx])
                 new_route = [depot_index, customer, depot_index]
                 routes.append(new_route)
+                seconds = np.append(seconds, customer)
+                lengths = np.append(lengths, len(new_route))
+                placed[customer_idx] = True
+                costs[customer_idx, :] = np.inf
+                costs = np.column_stack((costs, route_costs(customer, len(new_route))))
         
         return routes
     
-    def _merge_routes(self, routes: List[List[int]]) -> List[List[int]]:
+    def _merge_routes(self, routes: List[List[int]], num_vehicles: int,
+                      distance_matrix: np.ndarray) -> List[List[int]]:
         """Try to merge routes to reduce the number of routes"""
-        if len(routes) <= self.num_vehicles:
-            return routes
-        
-        # Sort routes by length (shorter routes first)
-        routes.sort(key=len)
-        
-        merged_routes = []
-        used_routes = set()
-        
-        for i, route1 in enumerate(routes):
-            if i in used_routes:
-                continue
-                
-            current_route = route1.copy()
-            used_routes.add(i)
-            
-            # Try to merge with other routes
-            for j, route2 in enumerate(routes[i+1:], i+1):
-                if j in used_routes:
-                    continue
-                    
-                # Check if we can merge these routes
-                if len(current_route) + len(route2) - 2 <= self.num_locations:  # -2 for depot overlap
-                    # Merge: route1 -> route2 (without duplicate depot)
-                    merged_route = current_route[:-1] + route2[1:]  # Remove duplicate depot
-                    
-                    # Check if merged route is valid (no duplicate customers)
-                    if len(set(merged_route)) == len(merged_route):
-                        current_route = merged_route
-                        used_routes.add(j)
-                        print(f"Merged routes {i} and {j}: {current_route}")
-            
-            merged_routes.append(current_route)
-        
-        return merged_routes
+        return _merge_routes(routes, num_vehicles, len(distance_matrix), distance_matrix)
 
 
 def solve_vrp_quantum(distance_matrix: np.ndarray, num_vehicles: int,
@@ -792,6 +1040,9 @@ def solve_vrp_quantum(distance_matrix: np.ndarray, num_vehicles: int,
     Returns:
         Solution dictionary with routes and metrics
     """
+    # One contiguous float32 copy up front; every row/column gather in the
+    # solver then reads half the bytes with unit stride
+    distance_matrix = np.ascontiguousarray(distance_matrix, dtype=np.float32)
     
     solver = QAOAVRPSolver(p_layers=p_layers, shots=shots)
     
@@ -812,6 +1063,48 @@ def solve_vrp_quantum(distance_matrix: np.ndarray, num_vehicles: int,
     }
 
 
+def _with_shared_distance_matrix(matrix_ref: Tuple[str, Tuple[int, ...], str],
+                                 fn: Callable[[np.ndarray], Any]) -> Any:
+    """Call fn with a read-only, zero-copy view of the shared-memory distance matrix"""
+    name, shape, dtype = matrix_ref
+    shm = shared_memory.SharedMemory(name=name)
+    view = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    view.flags.writeable = False
+    try:
+        return fn(view)
+    finally:
+        del view
+        try:
+            shm.close()
+        except BufferError:
+            # A surviving view (e.g. held by a traceback) keeps the mapping until it is collected
+            pass
+
+
+def _run_quantum(args: Tuple) -> Dict[str, Any]:
+    """Worker: solve with QAOA for one optimizer"""
+    matrix_ref, num_vehicles, optimizer, depot_index = args
+    result = _with_shared_distance_matrix(matrix_ref, lambda distance_matrix: solve_vrp_quantum(
+        distance_matrix=distance_matrix,
+        num_vehicles=num_vehicles,
+        optimizer=optimizer,
+        depot_index=depot_index,
+        maxiter=50  # Reduced for faster testing
+    ))
+    return result['data']
+
+
+def _run_classical(args: Tuple) -> Dict[str, Any]:
+    """Worker: solve with one classical algorithm"""
+    matrix_ref, num_vehicles, algorithm, depot_index = args
+    return _with_shared_distance_matrix(matrix_ref, lambda distance_matrix: solve_vrp_classical(
+        distance_matrix=distance_matrix,
+        num_vehicles=num_vehicles,
+        algorithm=algorithm,
+        depot_index=depot_index
+    ))
+
+
 def compare_quantum_classical(distance_matrix: np.ndarray, num_vehicles: int,
                             quantum_optimizers: List[str] = None,
                             classical_algorithms: List[str] = None,
@@ -835,48 +1128,51 @@ def compare_quantum_classical(distance_matrix: np.ndarray, num_vehicles: int,
         'comparison': {}
     }
     
-    # Run quantum algorithms
-    print("Running quantum algorithms...")
-    for optimizer in quantum_optimizers:
-        print(f"  Testing QAOA with {optimizer}...")
-        try:
-            result = solve_vrp_quantum(
-                distance_matrix=distance_matrix,
-                num_vehicles=num_vehicles,
-                optimizer=optimizer,
-                depot_index=depot_index,
-                maxiter=50  # Reduced for faster testing
-            )
-            results['quantum'][f'QAOA-{optimizer}'] = result['data']
-            
-            print(f"    Cost: {result['data']['total_cost']:.2f}, "
-                  f"Time: {result['data']['execution_time']:.2f}s, "
-                  f"Valid: {result['data'].get('is_valid', False)}")
+    # Every algorithm is independent, so run the whole sweep in worker processes.
+    # The distance matrix is shared once through shared memory instead of being
+    # pickled into each job.
+    dm = np.ascontiguousarray(distance_matrix, dtype=np.float64)
+    shm = shared_memory.SharedMemory(create=True, size=max(dm.nbytes, 1))
+    try:
+        np.ndarray(dm.shape, dtype=dm.dtype, buffer=shm.buf)[...] = dm
+        matrix_ref = (shm.name, dm.shape, dm.dtype.str)
+        
+        jobs = [('quantum', f'QAOA-{optimizer}', _run_quantum,
+                 (matrix_ref, num_vehicles, optimizer, depot_index))
+                for optimizer in quantum_optimizers]
+        jobs += [('classical', algorithm, _run_classical,
+                  (matrix_ref, num_vehicles, algorithm, depot_index))
+                 for algorithm in classical_algorithms]
+        
+        logger.info("Running quantum and classical algorithms...")
+        # Spawn, not fork: the caller may be a multi-threaded server with Aer/OpenMP/BLAS
+        # thread pools already running, and forking those can deadlock the children
+        with ProcessPoolExecutor(max_workers=max(1, min(len(jobs), os.cpu_count() or 1)),
+                                 mp_context=multiprocessing.get_context("spawn")) as executor:
+            futures = {}
+            for kind, name, run, args in jobs:
+                logger.debug("  Testing %s...", name)
+                futures[executor.submit(run, args)] = (kind, name)
             
-        except Exception as e:
-            print(f"    Failed: {e}")
-            results['quantum'][f'QAOA-{optimizer}'] = {'error': str(e)}
+            completed = {}
+            for future in as_completed(futures):
+                kind, name = futures[future]
+                try:
+                    result = future.result()
+                    logger.info("    %s - Cost: %.2f, Time: %.2fs, Valid: %s", name,
+                                result['total_cost'], result['execution_time'],
+                                result.get('is_valid', False))
+                except Exception as e:
+                    logger.warning("    %s failed: %s", name, e)
+                    result = {'error': str(e)}
+                completed[name] = result
+    finally:
+        shm.close()
+        shm.unlink()
     
-    # Run classical algorithms
-    print("\nRunning classical algorithms...")
-    for algorithm in classical_algorithms:
-        print(f"  Testing {algorithm}...")
-        try:
-            result = solve_vrp_classical(
-                distance_matrix=distance_matrix,
-                num_vehicles=num_vehicles,
-                algorithm=algorithm,
-                depot_index=depot_index
-            )
-            results['classical'][algorithm] = result
-            
-            print(f"    Cost: {result['total_cost']:.2f}, "
-                  f"Time: {result['execution_time']:.2f}s, "
-                  f"Valid: {result.get('is_valid', False)}")
-            
-        except Exception as e:
-            print(f"    Failed: {e}")
-            results['classical'][algorithm] = {'error': str(e)}
+    # Keep algorithm order stable regardless of completion order
+    for kind, name, _, _ in jobs:
+        results[kind][name] = completed[name]
     
     # Analysis
     all_results = {}